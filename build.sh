@@ -8,5 +8,12 @@ pip install -r requirements.txt
 # Convert static asset files
 python manage.py collectstatic --no-input
 
+# Refuse to deploy with settings the app can't run correctly on (e.g. a
+# per-process cache); security warnings are reported but don't fail the build
+python manage.py check --deploy --fail-level ERROR
+
 # Apply any outstanding database migrations
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+
+# Create the table behind a db:// CACHE_URL; a no-op for Redis or once it exists
+python manage.py createcachetable
\ No newline at end of file
@@ -1,6 +1,59 @@
 from django.contrib import admin
-from .models import Product, Order
+from .models import (
+    Product, Order, OrderItem, Task, CategoryRule, DailySales, DailyCategorySales, DailyProductSales, RollupMark,
+)
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+
+class OrderAdmin(admin.ModelAdmin):
+    inlines = [OrderItemInline]
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_at', 'created_at')
+    list_filter = ('status', 'name')
+
+class CategoryRuleAdmin(admin.ModelAdmin):
+    list_display = ('pattern', 'match_type', 'category', 'priority', 'is_active')
+    list_editable = ('priority', 'is_active')
+    list_filter = ('category', 'match_type', 'is_active')
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """Rollup tables are written only by `manage.py rollup_sales`."""
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+class DailySalesAdmin(ReadOnlyAdmin):
+    list_display = ('date', 'orders', 'units', 'revenue')
+    date_hierarchy = 'date'
+
+class DailyCategorySalesAdmin(ReadOnlyAdmin):
+    list_display = ('date', 'category', 'units', 'revenue')
+    list_filter = ('category',)
+    date_hierarchy = 'date'
+    list_select_related = ('category',)
+
+class DailyProductSalesAdmin(ReadOnlyAdmin):
+    list_display = ('date', 'product_name', 'units', 'revenue')
+    search_fields = ('product_name',)
+    date_hierarchy = 'date'
+
+class RollupMarkAdmin(ReadOnlyAdmin):
+    list_display = ('name', 'last_order_id', 'updated_at')
 
 # Register your models here so they show up in the admin panel
 admin.site.register(Product)
-admin.site.register(Order)
\ No newline at end of file
+admin.site.register(Order, OrderAdmin)
+admin.site.register(Task, TaskAdmin)
+admin.site.register(CategoryRule, CategoryRuleAdmin)
+admin.site.register(DailySales, DailySalesAdmin)
+admin.site.register(DailyCategorySales, DailyCategorySalesAdmin)
+admin.site.register(DailyProductSales, DailyProductSalesAdmin)
+admin.site.register(RollupMark, RollupMarkAdmin)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Register model signal handlers (search indexes, nav cache) and checks
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Lower
+
+UserModel = get_user_model()
+
+
+class EmailOrUsernameBackend(ModelBackend):
+    """
+    Logs users in with either their username or their email address.
+
+    Both are resolved in one query: an exact username match, or, when the
+    input contains '@', a case-insensitive email match compared as
+    lower(email) on non-blank emails, which the partial unique index
+    auth_user_email_lower_uniq from core/migrations/0020 serves. Username
+    matches sort first, so a username containing '@' always wins.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        match = Q(username=username)
+        if '@' in username:
+            # The email condition repeats the index's so the index can be used
+            match |= Q(email_lower=username.lower()) & ~Q(email='')
+        candidates = list(
+            UserModel._default_manager.alias(email_lower=Lower('email'))
+            .filter(match)
+            .annotate(match_rank=Case(
+                When(username=username, then=Value(0)), default=Value(1), output_field=IntegerField(),
+            ))
+            .order_by('match_rank')[:2]
+        )
+
+        user = None
+        # Two email matches can only happen where the unique index couldn't be
+        # created (MySQL); don't guess between them
+        if candidates and (candidates[0].match_rank == 0 or len(candidates) == 1):
+            user = candidates[0]
+
+        if user is None:
+            # Hash anyway so a missing account takes as long as a wrong password
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -1,83 +1,400 @@
+import copy
+import uuid
+from datetime import timedelta
 from decimal import Decimal
+from importlib import import_module
 from django.conf import settings
-from .models import Product
+from django.contrib.sessions.backends.signed_cookies import SessionStore as CookieSessionStore
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from .catalog import get_deletion_generation
+from .models import Product, ShoppingCart, CartItem
+
+# --- CART STORAGE BACKENDS ---
+# Every backend loads the cart as {product_id: {'quantity': int, 'price': str}}
+# and persists individual mutations. Cart keeps its own copy of that dict up to
+# date, so backends only have to write. Pick one with settings.CART_STORAGE.
+#
+# Session and cache carts hold bare product ids, so an item can outlive its
+# product (ghost_items_possible); Cart re-checks them whenever the catalog
+# deletion generation (core/catalog.py) has moved. That generation lives in the
+# default cache, which must be shared by all workers for deletes made in one
+# process to reach the others (enforced by `manage.py check --deploy`).
+# DatabaseCartStorage needs none of this: its CartItem rows cascade.
+
+def get_request_user(request):
+    user = getattr(request, 'user', None)
+    return user if user is not None and user.is_authenticated else None
+
+
+class SessionCartStorage:
+    """The whole cart dict lives in the session (one session write per change)."""
+    ghost_items_possible = True
+
+    def __init__(self, request):
+        self.session = request.session
+        # The session survives login, so the anonymous cart already is the user's
+        self.owner = request.session
+
+    def load(self):
+        # Cart mutates its dict in place, so remember a copy of what is stored
+        # and hand out another one; _save can then tell whether anything changed
+        self._saved = copy.deepcopy(self.session.get(settings.CART_SESSION_ID) or {})
+        return copy.deepcopy(self._saved)
+
+    def _save(self, cart):
+        # Assigning marks the session modified (an UPDATE of django_session),
+        # so skip it when e.g. a quantity is "changed" to its current value
+        if cart != self._saved:
+            self.session[settings.CART_SESSION_ID] = cart
+            self._saved = copy.deepcopy(cart)
+
+    def add(self, cart, product_id, quantity, price):
+        self._save(cart)
+
+    def set_quantity(self, cart, product_id, quantity, price):
+        self._save(cart)
+
+    def remove(self, cart, product_ids):
+        self._save(cart)
+
+    def clear(self):
+        self.session.pop(settings.CART_SESSION_ID, None)
+        self._saved = {}
+
+    def discard(self):
+        self.clear()
+
+
+def stored_session_key(session):
+    """
+    The key of a session kept on the server, saving a brand-new session so it
+    has one. None for signed-cookie sessions, which have no stored copy.
+    """
+    if isinstance(session, CookieSessionStore):
+        return None
+    if session.session_key is None:
+        session.save()
+    return session.session_key
+
+
+def _delete_carts(queryset):
+    # delete() also counts the cascaded CartItem rows; report carts only
+    return queryset.delete()[1].get(ShoppingCart._meta.label, 0)
+
+
+def delete_abandoned_carts(batch_size=1000):
+    """
+    Deletes anonymous DatabaseCartStorage carts whose session has expired or
+    been flushed (carts are already deleted when merged at login). Carts made
+    under signed-cookie sessions can't be checked, so they are kept until
+    SESSION_COOKIE_AGE after they were created. Returns the number deleted.
+    """
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    anonymous = ShoppingCart.objects.filter(user__isnull=True)
+    cutoff = timezone.now() - timedelta(seconds=settings.SESSION_COOKIE_AGE)
+    deleted = _delete_carts(anonymous.filter(session_key__isnull=True, created_at__lt=cutoff))
+
+    last_id = 0
+    while True:
+        carts = list(
+            anonymous.filter(id__gt=last_id, session_key__isnull=False)
+            .order_by('id').values_list('id', 'session_key')[:batch_size]
+        )
+        if not carts:
+            return deleted
+        last_id = carts[-1][0]
+        keys = {key for _, key in carts}
+        if hasattr(store, 'get_model_class'):
+            # db / cached_db: one query; expired rows count as gone even
+            # before clearsessions removes them
+            live = set(
+                store.get_model_class().objects
+                .filter(session_key__in=keys, expire_date__gt=timezone.now())
+                .values_list('session_key', flat=True)
+            )
+        else:
+            live = {key for key in keys if store().exists(key)}
+        gone = [cart_id for cart_id, key in carts if key not in live]
+        if gone:
+            deleted += _delete_carts(anonymous.filter(pk__in=gone))
+
+
+class DatabaseCartStorage:
+    """One CartItem row per line, so each mutation is a single-row write."""
+    ghost_items_possible = False  # CartItem.product cascades on delete
+
+    def __init__(self, request):
+        self.session = request.session
+        self.user = get_request_user(request)
+        self._cart_id = None if self.user else self.session.get(settings.CART_ID_SESSION_KEY)
+        self.owner = ('user', self.user.pk) if self.user else ('anonymous', self._cart_id)
+
+    def _items(self):
+        if self.user:
+            return CartItem.objects.filter(cart__user=self.user)
+        if self._cart_id is None:
+            return CartItem.objects.none()
+        return CartItem.objects.filter(cart_id=self._cart_id)
+
+    def _get_cart_id(self):
+        """Resolves (creating on first write) the ShoppingCart row for this visitor."""
+        if self._cart_id is None:
+            if self.user:
+                self._cart_id = ShoppingCart.objects.get_or_create(user=self.user)[0].pk
+            else:
+                self._cart_id = ShoppingCart.objects.create(session_key=stored_session_key(self.session)).pk
+                self.session[settings.CART_ID_SESSION_KEY] = self._cart_id
+        return self._cart_id
+
+    def load(self):
+        rows = self._items().values_list('product_id', 'quantity', 'price')
+        return {
+            str(product_id): {'quantity': quantity, 'price': str(price)}
+            for product_id, quantity, price in rows
+        }
+
+    def _upsert(self, product_id, new_quantity, quantity, price):
+        """UPDATE the line to `new_quantity`, or INSERT it with `quantity` if missing."""
+        cart_id = self._get_cart_id()
+        line = CartItem.objects.filter(cart_id=cart_id, product_id=product_id)
+        if line.update(quantity=new_quantity):
+            return
+        try:
+            with transaction.atomic():
+                CartItem.objects.create(cart_id=cart_id, product_id=product_id, quantity=quantity, price=price)
+        except IntegrityError:
+            # Another request inserted the line first; update it instead
+            line.update(quantity=new_quantity)
+
+    def add(self, cart, product_id, quantity, price):
+        self._upsert(product_id, F('quantity') + quantity, quantity, price)
+
+    def set_quantity(self, cart, product_id, quantity, price):
+        self._upsert(product_id, quantity, quantity, price)
+
+    def remove(self, cart, product_ids):
+        self._items().filter(product_id__in=product_ids).delete()
+
+    def clear(self):
+        self._items().delete()
+
+    def discard(self):
+        """Deletes the cart row itself (used once an anonymous cart is merged)."""
+        if self._cart_id is not None:
+            ShoppingCart.objects.filter(pk=self._cart_id, user__isnull=True).delete()
+        self.session.pop(settings.CART_ID_SESSION_KEY, None)
+
+
+class CacheCartStorage:
+    """
+    The cart dict under one cache key per visitor. Only worth using with a
+    shared, persistent cache (e.g. Redis) configured as CART_CACHE_ALIAS.
+    """
+    ghost_items_possible = True
+
+    def __init__(self, request):
+        self.session = request.session
+        self.cache = caches[settings.CART_CACHE_ALIAS]
+        user = get_request_user(request)
+        if user:
+            self.key = f'cart:user:{user.pk}'
+        else:
+            token = self.session.get(settings.CART_ID_SESSION_KEY)
+            self.key = f'cart:anonymous:{token}' if token else None
+        self.owner = self.key
+
+    def load(self):
+        # Same change detection as SessionCartStorage: unchanged carts skip the cache write
+        self._saved = (self.cache.get(self.key) if self.key is not None else None) or {}
+        return copy.deepcopy(self._saved)
+
+    def _save(self, cart):
+        if cart == self._saved:
+            return
+        self._saved = copy.deepcopy(cart)
+        if self.key is None:
+            token = uuid.uuid4().hex
+            self.session[settings.CART_ID_SESSION_KEY] = token
+            self.key = self.owner = f'cart:anonymous:{token}'
+        self.cache.set(self.key, cart, settings.CART_CACHE_TIMEOUT)
+
+    def add(self, cart, product_id, quantity, price):
+        self._save(cart)
+
+    def set_quantity(self, cart, product_id, quantity, price):
+        self._save(cart)
+
+    def remove(self, cart, product_ids):
+        self._save(cart)
+
+    def clear(self):
+        if self.key is not None:
+            self.cache.delete(self.key)
+        self._saved = {}
+
+    def discard(self):
+        self.clear()
+        self.session.pop(settings.CART_ID_SESSION_KEY, None)
+
+
+def get_cart_storage(request):
+    return import_string(settings.CART_STORAGE)(request)
+
 
 class Cart:
     def __init__(self, request):
         """Initialize the cart and remove 'ghost' items."""
         self.session = request.session
-        cart = self.session.get(settings.CART_SESSION_ID)
-        if not cart:
-            cart = self.session[settings.CART_SESSION_ID] = {}
-        self.cart = cart
-        
+        self.storage = get_cart_storage(request)
+        self.cart = self.storage.load()
+
+        # Products and line totals are loaded once and reused by every
+        # __iter__ / get_total_price call for the rest of the request
+        self._products = None
+        self._lines = None
+        self._total = None
+
         # --- NEW AUTO-CLEANUP LOGIC ---
-        # This runs every time the cart is used
-        self.cleanup_ghost_items()
+        # Only re-check the cart when products have been deleted since it was
+        # last validated; empty carts (and storages that cascade) never need it
+        if self.cart and self.storage.ghost_items_possible:
+            generation = get_deletion_generation()
+            if self.session.get(settings.CART_GENERATION_SESSION_ID) != generation:
+                self.cleanup_ghost_items()
+                self.session[settings.CART_GENERATION_SESSION_ID] = generation
+
+    def _get_products(self):
+        """Fetches every product in the cart with a single query, keyed by product id."""
+        if self._products is None:
+            if self.cart:
+                products = Product.objects.filter(id__in=self.cart.keys())
+                self._products = {str(product.id): product for product in products}
+            else:
+                self._products = {}
+        return self._products
+
+    def _get_lines(self):
+        """Builds the cart lines and the grand total together in one pass."""
+        if self._lines is None:
+            products = self._get_products()
+            lines = []
+            total = Decimal('0.00')
+
+            for product_id, item in self.cart.items():
+                product = products.get(product_id)
+                if product is None:
+                    continue
+                price = Decimal(item['price'])
+                line_total = price * item['quantity']
+                lines.append({
+                    'product': product,
+                    'quantity': item['quantity'],
+                    'price': price,
+                    'total_price': line_total,
+                })
+                total += line_total
+
+            self._lines = lines
+            self._total = total
+        return self._lines
+
+    def _reset(self):
+        self._products = None
+        self._lines = None
+        self._total = None
 
     def cleanup_ghost_items(self):
-        """Remove items from session that don't exist in the database."""
+        """Remove items from the cart that don't exist in the database."""
         product_ids = list(self.cart.keys())
-        
-        # Find which of these IDs actually exist in the DB
-        valid_products = Product.objects.filter(id__in=product_ids).values_list('id', flat=True)
-        valid_ids = [str(pid) for pid in valid_products]
-        
-        cart_modified = False
-        for pid in product_ids:
-            if pid not in valid_ids:
-                # If session ID is not in DB, remove it
-                del self.cart[pid]
-                cart_modified = True
-        
-        if cart_modified:
-            self.save()
+
+        # Find which of these IDs actually exist in the DB (this also warms
+        # the product map used for rendering)
+        valid_ids = self._get_products()
+
+        ghost_ids = [pid for pid in product_ids if pid not in valid_ids]
+        for pid in ghost_ids:
+            del self.cart[pid]
+
+        if ghost_ids:
+            self.storage.remove(self.cart, ghost_ids)
 
     def add(self, product, quantity=1):
         product_id = str(product.id)
         if product_id not in self.cart:
             self.cart[product_id] = {'quantity': 0, 'price': str(product.price)}
-        
+
         self.cart[product_id]['quantity'] += quantity
-        self.save()
+        self.storage.add(self.cart, product_id, quantity, self.cart[product_id]['price'])
+        self._reset()
+
+    def set_quantity(self, product, quantity):
+        """Sets a line to an exact quantity; zero or less removes it."""
+        if quantity <= 0:
+            return self.remove(product)
+
+        product_id = str(product.id)
+        if product_id not in self.cart:
+            self.cart[product_id] = {'quantity': 0, 'price': str(product.price)}
+
+        self.cart[product_id]['quantity'] = quantity
+        self.storage.set_quantity(self.cart, product_id, quantity, self.cart[product_id]['price'])
+        self._reset()
 
     def remove(self, product):
         product_id = str(product.id)
         if product_id in self.cart:
             del self.cart[product_id]
-            self.save()
+            self.storage.remove(self.cart, [product_id])
+            self._reset()
 
-    def __iter__(self):
-        product_ids = self.cart.keys()
-        products = Product.objects.filter(id__in=product_ids)
-        cart = self.cart.copy()
+    def get_line(self, product):
+        """Returns the quantity/price/total of one product's line, or None."""
+        item = self.cart.get(str(product.id))
+        if item is None:
+            return None
+        price = Decimal(item['price'])
+        return {
+            'product_id': product.id,
+            'name': product.name,
+            'quantity': item['quantity'],
+            'price': str(price),
+            'total_price': str(price * item['quantity']),
+        }
 
-        for product in products:
-            cart[str(product.id)]['product'] = product
+    def merge(self, other):
+        """Folds another cart (the pre-login anonymous one) into this one."""
+        if other.storage.owner == self.storage.owner:
+            return
+        for product_id, item in other.cart.items():
+            if product_id not in self.cart:
+                self.cart[product_id] = {'quantity': 0, 'price': item['price']}
+            self.cart[product_id]['quantity'] += item['quantity']
+            self.storage.add(self.cart, product_id, item['quantity'], self.cart[product_id]['price'])
+        other.storage.discard()
+        self._reset()
 
-        for item in cart.values():
-            if 'product' in item:
-                item['price'] = Decimal(item['price'])
-                item['total_price'] = item['price'] * item['quantity']
-                yield item
+    def __iter__(self):
+        return iter(self._get_lines())
 
     def __len__(self):
         return sum(item['quantity'] for item in self.cart.values())
 
     def get_total_price(self):
-        product_ids = self.cart.keys()
-        products = Product.objects.filter(id__in=product_ids)
-        total = Decimal('0.00')
-        
-        for product in products:
-            cart_item = self.cart.get(str(product.id))
-            if cart_item:
-                total += Decimal(cart_item['price']) * cart_item['quantity']
-        return total
+        self._get_lines()
+        return self._total
 
     def clear(self):
-        del self.session[settings.CART_SESSION_ID]
-        self.save()
+        self.storage.clear()
+        self.cart = {}
+        self._reset()
+
 
-    def save(self):
-        self.session.modified = True
\ No newline at end of file
+def get_request_cart(request):
+    """Returns the Cart for this request, building it at most once."""
+    if not hasattr(request, '_cart'):
+        request._cart = Cart(request)
+    return request._cart
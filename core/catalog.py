@@ -0,0 +1,69 @@
+"""
+Cached category navigation and catalog change counters.
+
+The category menu (with per-category product counts) is stored under a
+single cache key, so rendering it costs one cache read and no queries. Saving
+or deleting a Category or a Product (see core/signals.py) bumps the catalog
+version, which retires the cached pages (core/middleware.py), and deletes the
+menu entry. Both are only seen by every worker process when the default cache
+is shared between them (CACHE_URL in settings).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Category
+
+CATEGORY_VERSION_KEY = 'catalog:categories:version'
+NAV_CATEGORIES_KEY = 'catalog:categories'
+DELETION_GENERATION_KEY = 'catalog:deletions:generation'
+
+
+def _get_version(key):
+    # Versions are timestamps, so a key lost to eviction comes back as a new,
+    # never-seen value instead of resurrecting an older one.
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.add(key, version, None)
+        version = cache.get(key, version)
+    return version
+
+
+def _bump_version(key):
+    cache.set(key, time.time_ns(), None)
+
+
+def get_category_version():
+    return _get_version(CATEGORY_VERSION_KEY)
+
+
+def bump_category_version():
+    _bump_version(CATEGORY_VERSION_KEY)
+    cache.delete(NAV_CATEGORIES_KEY)
+    # A page rendered before the write commits can put the old menu back;
+    # delete it again once the write is visible
+    transaction.on_commit(lambda: cache.delete(NAV_CATEGORIES_KEY))
+
+
+def get_deletion_generation():
+    """Changes whenever a Product is deleted; carts compare it to skip re-validation."""
+    return _get_version(DELETION_GENERATION_KEY)
+
+
+def bump_deletion_generation():
+    _bump_version(DELETION_GENERATION_KEY)
+
+
+def get_nav_categories():
+    """Returns all categories annotated with `product_count`, served from cache."""
+    categories = cache.get(NAV_CATEGORIES_KEY)
+    if categories is None:
+        categories = list(
+            Category.objects.annotate(product_count=Count('products')).order_by('id')
+        )
+        cache.set(NAV_CATEGORIES_KEY, categories, settings.NAV_CACHE_TIMEOUT)
+    return categories
@@ -0,0 +1,108 @@
+"""
+Rule-based product categorization (`manage.py categorize_products`).
+
+The active CategoryRule rows are compiled once into a single ordered list of
+regexes. Products are then read in id-ordered batches as (id, name,
+category_id) tuples, and every product whose category should change in a
+batch is moved with one UPDATE ... SET category_id = CASE ... END. Unchanged
+products are never written.
+"""
+import re
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+
+from .catalog import bump_category_version
+from .models import Category, CategoryRule, Product
+
+
+@dataclass
+class Change:
+    product_id: int
+    name: str
+    old_category_id: int
+    new_category_id: int
+
+
+@dataclass
+class CategorizeResult:
+    checked: int = 0
+    unmatched: int = 0
+    changes: list = field(default_factory=list)
+
+
+def compile_rules():
+    """Returns [(compiled regex, category_id)] for the active rules, in priority order."""
+    compiled = []
+    for rule in CategoryRule.objects.filter(is_active=True).order_by('priority', 'id'):
+        pattern = re.escape(rule.pattern) if rule.match_type == CategoryRule.KEYWORD else rule.pattern
+        compiled.append((re.compile(pattern, re.IGNORECASE), rule.category_id))
+    return compiled
+
+
+def classify(name, rules):
+    for regex, category_id in rules:
+        if regex.search(name):
+            return category_id
+    return None
+
+
+def apply_changes(changes):
+    """Moves every product in `changes` with a single CASE-based UPDATE."""
+    by_category = {}
+    for change in changes:
+        by_category.setdefault(change.new_category_id, []).append(change.product_id)
+    Product.objects.filter(pk__in=[change.product_id for change in changes]).update(
+        category_id=Case(
+            *[When(pk__in=pks, then=Value(category_id)) for category_id, pks in by_category.items()],
+            output_field=IntegerField(),
+        )
+    )
+
+
+def categorize_products(dry_run=False, only_uncategorized=False, batch_size=None):
+    """
+    Re-runs the rules over the catalog. Products no rule matches keep their
+    current category. With dry_run nothing is written; the returned result's
+    `changes` lists what would move either way.
+    """
+    batch_size = batch_size or settings.CATEGORIZE_BATCH_SIZE
+    rules = compile_rules()
+    result = CategorizeResult()
+
+    products = Product.objects.order_by('id')
+    if only_uncategorized:
+        products = products.filter(category__isnull=True)
+
+    last_id = 0
+    while True:
+        batch = list(products.filter(id__gt=last_id).values_list('id', 'name', 'category_id')[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        changes = []
+        for product_id, name, category_id in batch:
+            new_category_id = classify(name, rules)
+            if new_category_id is None:
+                result.unmatched += 1
+            elif new_category_id != category_id:
+                changes.append(Change(product_id, name, category_id, new_category_id))
+        result.checked += len(batch)
+        result.changes.extend(changes)
+
+        if changes and not dry_run:
+            with transaction.atomic():
+                apply_changes(changes)
+
+    if result.changes and not dry_run:
+        # update() skips the Product signals that refresh the category menu counts
+        bump_category_version()
+    return result
+
+
+def category_names(changes):
+    ids = {c.old_category_id for c in changes} | {c.new_category_id for c in changes}
+    return dict(Category.objects.filter(id__in=ids - {None}).values_list('id', 'name'))
@@ -0,0 +1,73 @@
+"""
+Order placement.
+
+Stock is reserved with one conditional UPDATE per line
+(`... SET stock = stock - n WHERE id = ? AND stock >= n`), so the database
+row lock, not a read in Python, decides who gets the last unit. All
+reservations, the Order, its OrderItems and its follow-up tasks share one
+transaction: if any line cannot be reserved, nothing is written.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Order, OrderItem, Product
+from .tasks import enqueue
+
+
+class OutOfStock(Exception):
+    """Raised when a line asks for more units than are left."""
+
+    def __init__(self, products):
+        self.products = products
+        names = ', '.join(product.name for product in products)
+        super().__init__(f"Not enough stock for: {names}")
+
+
+def reserve_stock(product, quantity):
+    """Takes `quantity` units of `product` if they are available. Returns True on success."""
+    return bool(
+        Product.objects
+        .filter(Q(stock__isnull=True) | Q(stock__gte=quantity), pk=product.pk)
+        .update(stock=F('stock') - quantity)
+    )
+
+
+def place_order(user, lines, idempotency_key=None):
+    """
+    Creates an Order for `user` from cart lines (dicts with product, quantity
+    and price, as yielded by Cart) after reserving stock for every line.
+
+    A repeated `idempotency_key` for the same user violates the order table's
+    unique constraint, so the duplicate's reservations are rolled back and
+    IntegrityError propagates to the caller.
+    """
+    # Lock rows in a fixed order so two carts sharing products can't deadlock
+    lines = sorted(lines, key=lambda item: item['product'].pk)
+
+    with transaction.atomic():
+        missing = [item['product'] for item in lines if not reserve_stock(item['product'], item['quantity'])]
+        if missing:
+            # Leaving the atomic block with an exception undoes the reservations
+            raise OutOfStock(missing)
+
+        order = Order.objects.create(
+            user=user,
+            # Kept as a human-readable summary (admin, old orders)
+            product_names="\n".join(f"{item['quantity']}x {item['product'].name}" for item in lines),
+            total_price=sum(item['price'] * item['quantity'] for item in lines),
+            idempotency_key=idempotency_key,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=item['product'],
+                product_name=item['product'].name,
+                quantity=item['quantity'],
+                unit_price=item['price'],
+            )
+            for item in lines
+        ])
+        # Side effects run in the worker, not in the checkout request; queuing
+        # them in the same transaction means they exist iff the order does
+        enqueue('send_order_confirmation', order_id=order.id)
+    return order
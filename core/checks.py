@@ -0,0 +1,31 @@
+"""
+System checks for settings the app relies on in production
+(run by `manage.py check --deploy`, see build.sh).
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+DATABASE_CACHES = ('django.core.cache.backends.db.DatabaseCache',)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    # The catalog versions, the cart deletion generation and the cached order
+    # summaries are invalidated through the default cache; with a per-process
+    # one, changes made by one worker are invisible to the rest
+    backend = settings.CACHES['default']['BACKEND']
+    if backend in PROCESS_LOCAL_CACHES:
+        return [Error(
+            "The default cache is local to each process.",
+            hint="Set CACHE_URL to a redis:// (or db://) cache shared by every worker.",
+            id='core.E001',
+        )]
+    # Shared, but the pages the cache exists to spare the database still query it
+    if backend in DATABASE_CACHES:
+        return [Warning(
+            "The default cache is stored in the database, so every cache read is a query.",
+            hint="Set CACHE_URL to a redis:// cache.",
+            id='core.W001',
+        )]
+    return []
@@ -0,0 +1,17 @@
+from django.utils.functional import SimpleLazyObject
+
+from .cart import get_request_cart
+from .wishlist import get_request_wishlist_ids
+
+
+def cart(request):
+    """Exposes `cart_count` (number of distinct cart lines) to every template, loaded lazily."""
+    return {'cart_count': SimpleLazyObject(lambda: len(get_request_cart(request).cart))}
+
+
+def wishlist(request):
+    """
+    Exposes `wishlist_ids` so grids can test `product.id in wishlist_ids`; the
+    whole set is one query, run only if a template actually looks at it.
+    """
+    return {'wishlist_ids': SimpleLazyObject(lambda: get_request_wishlist_ids(request))}
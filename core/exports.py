@@ -0,0 +1,98 @@
+"""
+Streaming catalog and order exports (NDJSON or CSV).
+
+Rows are read with values() and .iterator(chunk_size) and turned into output
+lines one at a time, so the export views (StreamingHttpResponse) and the
+export_products / export_orders commands use the same small amount of memory
+whether there are a hundred rows or a million.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from .models import OrderItem, Product
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+PRODUCT_COLUMNS = ['id', 'name', 'description', 'price', 'stock', 'category_name', 'image', 'created_at']
+ORDER_COLUMNS = ['id', 'username', 'total_price', 'created_at']
+ORDER_ITEM_COLUMNS = ['product_id', 'product_name', 'quantity', 'unit_price']
+
+
+class Echo:
+    """A file-like object for csv.writer that hands each line back instead of storing it."""
+    def write(self, value):
+        return value
+
+
+def iter_products(queryset=None, chunk_size=None):
+    queryset = Product.objects.all() if queryset is None else queryset
+    rows = queryset.order_by('id').values(
+        'id', 'name', 'description', 'price', 'stock', 'image', 'created_at',
+        category_name=F('category__name'),
+    )
+    return rows.iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE)
+
+
+def iter_orders(queryset, chunk_size=None):
+    """
+    Yields each order as a dict with its lines under 'items'. Orders are read
+    in chunks and each chunk's lines are fetched with one extra query.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    rows = queryset.order_by('id').values('id', 'total_price', 'created_at', username=F('user__username'))
+    rows = rows.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        items = {}
+        lines = (
+            OrderItem.objects.filter(order_id__in=[order['id'] for order in chunk])
+            .order_by('id')
+            .values('order_id', *ORDER_ITEM_COLUMNS)
+        )
+        for line in lines:
+            items.setdefault(line.pop('order_id'), []).append(line)
+        for order in chunk:
+            order['items'] = items.get(order['id'], [])
+            yield order
+
+
+def ndjson_lines(records):
+    for record in records:
+        yield json.dumps(record, cls=DjangoJSONEncoder) + '\n'
+
+
+def product_csv_lines(records):
+    writer = csv.writer(Echo())
+    yield writer.writerow(PRODUCT_COLUMNS)
+    for record in records:
+        yield writer.writerow([record[column] for column in PRODUCT_COLUMNS])
+
+
+def order_csv_lines(records):
+    """One CSV row per order line, with the order's columns repeated on each."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(ORDER_COLUMNS + ORDER_ITEM_COLUMNS)
+    for record in records:
+        order = [record[column] for column in ORDER_COLUMNS]
+        for item in record['items'] or [dict.fromkeys(ORDER_ITEM_COLUMNS, '')]:
+            yield writer.writerow(order + [item[column] for column in ORDER_ITEM_COLUMNS])
+
+
+def export_products(file_format, queryset=None):
+    records = iter_products(queryset)
+    return ndjson_lines(records) if file_format == 'ndjson' else product_csv_lines(records)
+
+
+def export_orders(file_format, queryset):
+    records = iter_orders(queryset)
+    return ndjson_lines(records) if file_format == 'ndjson' else order_csv_lines(records)
@@ -133,4 +133,12 @@ class AccountSettingsForm(forms.ModelForm):
             'first_name': forms.TextInput(attrs={'class': 'form-control'}),
             'last_name': forms.TextInput(attrs={'class': 'form-control'}),
             'email': forms.EmailInput(attrs={'class': 'form-control'}),
-        }
\ No newline at end of file
+        }
+
+    def clean_email(self):
+        # Same check as the case-insensitive unique index on auth_user.email,
+        # so a clash is a form error rather than an IntegrityError
+        email = self.cleaned_data.get('email', '')
+        if email and User.objects.filter(email__iexact=email).exclude(pk=self.instance.pk).exists():
+            raise forms.ValidationError("That email is already in use.")
+        return email
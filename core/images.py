@@ -0,0 +1,110 @@
+"""
+Resized product image variants.
+
+Every uploaded product image gets fixed-width copies (PRODUCT_IMAGE_WIDTHS,
+never wider than the original) in its own format and as WebP, stored next to
+the upload under products/variants/. The widths actually written and the
+content-hashed names the storage gave each copy (core/storage.py) are recorded
+on Product.image_variants, so the {% product_image %} tag can build srcset
+lists without touching storage. Variants are made by the background worker
+after an upload (see core/signals.py) or by `manage.py generate_product_images`.
+"""
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .catalog import bump_category_version
+from .models import Product
+from .storage import strip_hash
+
+VARIANT_DIR = 'variants'
+
+
+def variant_name(source, width, ext):
+    """
+    'products/shoe.0123456789ab.jpg', 320, 'webp' -> 'products/variants/shoe-320w.webp',
+    which the storage saves under a hash of the variant's own content.
+    """
+    directory, filename = os.path.split(source)
+    stem = strip_hash(os.path.splitext(filename)[0])
+    return os.path.join(directory, VARIANT_DIR, f'{stem}-{width}w.{ext}')
+
+
+def variant_names(variants, ext):
+    """The stored names of one format's variants, in the order of variants['widths']."""
+    if 'names' in variants:
+        return variants['names'][ext]
+    # Recorded before the names were: the copies were saved as named
+    return [variant_name(variants['source'], width, ext) for width in variants['widths']]
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def has_current_variants(product):
+    return bool(product.image) and product.image_variants.get('source') == product.image.name
+
+
+def delete_variants(storage, variants):
+    for ext in (variants['ext'], 'webp'):
+        for name in variant_names(variants, ext):
+            if storage.exists(name):
+                storage.delete(name)
+
+
+def generate_variants(product, force=False):
+    """
+    Writes the resized copies of product.image and records them on the product.
+    Returns the widths written (an empty list if there was nothing to do).
+    """
+    if not product.image or (has_current_variants(product) and not force):
+        return []
+
+    storage = product.image.storage
+    if product.image_variants.get('widths'):
+        # The image was replaced (or is being redone): drop the old copies
+        delete_variants(storage, product.image_variants)
+
+    with product.image.open('rb') as f:
+        original = ImageOps.exif_transpose(Image.open(f))
+        original.load()
+
+    # The non-WebP copies are PNG when transparency has to survive, else JPEG.
+    # Palette/CMYK/greyscale images are converted first so resizing can filter.
+    if has_alpha(original):
+        image_format, ext, mode = 'PNG', 'png', 'RGBA'
+    else:
+        image_format, ext, mode = 'JPEG', 'jpg', 'RGB'
+    if original.mode != mode:
+        original = original.convert(mode)
+
+    widths = [w for w in settings.PRODUCT_IMAGE_WIDTHS if w < original.width]
+    names = {ext: [], 'webp': []}
+    for width in widths:
+        height = round(original.height * width / original.width)
+        resized = original.resize((width, height), Image.LANCZOS)
+        for fmt, suffix in ((image_format, ext), ('WEBP', 'webp')):
+            buffer = BytesIO()
+            resized.save(buffer, fmt, quality=settings.PRODUCT_IMAGE_QUALITY, optimize=True)
+            # Saved under a new, content-hashed name; files are never rewritten
+            # in place, so browsers may cache each name for good
+            name = variant_name(product.image.name, width, suffix)
+            names[suffix].append(storage.save(name, ContentFile(buffer.getvalue())))
+
+    product.image_variants = {
+        'source': product.image.name,
+        'ext': ext,
+        'widths': widths,
+        'names': names,
+        'width': original.width,
+        'height': original.height,
+    }
+    # update() rather than save(): re-saving would re-run the Product signals,
+    # so retire the cached pages that still show the plain <img> by hand
+    Product.objects.filter(pk=product.pk).update(image_variants=product.image_variants)
+    bump_category_version()
+    return widths
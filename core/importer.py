@@ -0,0 +1,258 @@
+"""
+Bulk catalog import used by `manage.py import_catalog`.
+
+Rows are streamed from a CSV or JSON Lines file and processed in batches: one
+query finds which names already exist, images for the batch are read or
+downloaded in a thread pool, and products are written with bulk_create /
+bulk_update. Bulk writes skip model signals, so each batch also updates the
+search index and queues image-variant tasks itself, and the category menu
+cache is invalidated once at the end.
+"""
+import csv
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from io import BytesIO
+from urllib.parse import urlparse
+from urllib.request import url2pathname, urlopen
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.text import slugify
+from PIL import Image
+
+from .catalog import bump_category_version
+from .models import Category, Product
+from .search import get_backend
+from .tasks import enqueue_many
+
+class RowError(ValueError):
+    """A row that can't be imported (missing name, bad price ...)."""
+
+
+@dataclass
+class ImportStats:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    images: int = 0
+    image_errors: int = 0
+
+
+def read_rows(path, file_format=None):
+    """
+    Yields (line number, row dict) for each product in a .csv or .jsonl file
+    without loading it whole. A JSON line that can't be decoded is yielded as
+    a RowError in place of the dict, so parse_row reports it and the import
+    goes on.
+    """
+    file_format = file_format or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+    with open(path, newline='', encoding='utf-8') as f:
+        if file_format == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield number, RowError(f"invalid JSON ({exc.msg})")
+
+
+def parse_row(row):
+    """
+    Returns the cleaned fields of one row. 'stock' is None when the column is
+    missing or empty, which leaves an existing product's stock alone.
+    """
+    if isinstance(row, RowError):
+        raise row
+    if not isinstance(row, dict):
+        raise RowError("not an object")
+    name = (row.get('name') or '').strip()
+    if not name:
+        raise RowError("missing name")
+    try:
+        price = Decimal(str(row.get('price')).strip())
+    except InvalidOperation:
+        raise RowError(f"bad price {row.get('price')!r}")
+    stock = row.get('stock')
+    if stock in (None, ''):
+        stock = None
+    else:
+        try:
+            stock = int(stock)
+        except ValueError:
+            raise RowError(f"bad stock {stock!r}")
+        if stock < 0:
+            raise RowError(f"bad stock {stock!r}")
+    return {
+        'name': name,
+        'description': (row.get('description') or '').strip(),
+        'price': price,
+        'category': (row.get('category') or '').strip(),
+        'stock': stock,
+        'image': (row.get('image') or row.get('image_url') or '').strip(),
+    }
+
+
+def read_image(source, base_dir):
+    """Returns the bytes of an http(s) URL, file:// URL or path (relative to the input file)."""
+    parsed = urlparse(source)
+    if parsed.scheme in ('http', 'https'):
+        with urlopen(source, timeout=settings.IMPORT_IMAGE_TIMEOUT) as response:
+            return response.read()
+    path = url2pathname(parsed.path) if parsed.scheme == 'file' else source
+    with open(os.path.join(base_dir, path), 'rb') as f:
+        return f.read()
+
+
+def store_image(name, source, base_dir):
+    """Fetches and saves one product image, returning its storage name. Runs in the pool."""
+    data = read_image(source, base_dir)
+    # Refuse error pages and truncated downloads before they reach media/
+    Image.open(BytesIO(data)).verify()
+    ext = os.path.splitext(urlparse(source).path)[1].lower() or '.jpg'
+    return default_storage.save(f'products/{slugify(name)}{ext}', ContentFile(data))
+
+
+def category_slug(name):
+    """A URL-safe slug for a new category, numbered if another category has it."""
+    base = slugify(name) or 'category'
+    slug, number = base, 1
+    while Category.objects.filter(slug=slug).exists():
+        number += 1
+        slug = f'{base}-{number}'
+    return slug
+
+
+class CatalogImporter:
+    def __init__(self, base_dir='.', batch_size=None, workers=None, log=None):
+        self.base_dir = base_dir
+        self.batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+        self.workers = workers or settings.IMPORT_IMAGE_WORKERS
+        self.log = log or (lambda message: None)
+        self.stats = ImportStats()
+        self.seen = set()
+        self.categories = {category.name: category for category in Category.objects.all()}
+
+    def run(self, rows):
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            batch = []
+            for number, row in rows:
+                try:
+                    item = parse_row(row)
+                except RowError as exc:
+                    self.stats.invalid += 1
+                    self.log(f"row {number}: {exc}")
+                    continue
+                # The first row for a name wins; repeats later in the file are dropped
+                if item['name'] in self.seen:
+                    self.stats.duplicates += 1
+                    continue
+                self.seen.add(item['name'])
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    self.import_batch(batch, pool)
+                    batch = []
+            if batch:
+                self.import_batch(batch, pool)
+
+        bump_category_version()
+        return self.stats
+
+    def get_category_id(self, name):
+        if not name:
+            return None
+        if name not in self.categories:
+            self.categories[name] = Category.objects.get_or_create(
+                name=name, defaults={'slug': category_slug(name)},
+            )[0]
+        return self.categories[name].id
+
+    def fetch_images(self, items, pool):
+        """Downloads/copies the images of `items` concurrently; returns {name: storage name}."""
+        futures = {
+            item['name']: pool.submit(store_image, item['name'], item['image'], self.base_dir)
+            for item in items
+        }
+        images = {}
+        for name, future in futures.items():
+            try:
+                images[name] = future.result()
+            except Exception as exc:
+                # A bad image shouldn't cost the product; it's imported without one
+                self.stats.image_errors += 1
+                self.log(f"{name}: image {exc}")
+        self.stats.images += len(images)
+        return images
+
+    def import_batch(self, batch, pool):
+        existing = {}
+        for product in Product.objects.filter(name__in=[item['name'] for item in batch]):
+            existing.setdefault(product.name, product)
+
+        needs_image = [
+            item for item in batch
+            if item['image'] and not (item['name'] in existing and existing[item['name']].image)
+        ]
+        images = self.fetch_images(needs_image, pool)
+
+        to_create, to_update = [], {}
+        for item in batch:
+            values = {
+                'description': item['description'],
+                'price': item['price'],
+                'category_id': self.get_category_id(item['category']),
+            }
+            if item['stock'] is not None:
+                values['stock'] = item['stock']
+            product = existing.get(item['name'])
+            if product is None:
+                to_create.append(Product(name=item['name'], image=images.get(item['name']), **values))
+                continue
+            changed = [field for field, value in values.items() if getattr(product, field) != value]
+            if item['name'] in images:
+                product.image = images[item['name']]
+                changed.append('image')
+            if changed:
+                for field, value in values.items():
+                    setattr(product, field, value)
+                # Rows without a stock column are written without it, so orders
+                # placed meanwhile keep their reservations
+                to_update.setdefault(tuple(values) + ('image',), []).append(product)
+            else:
+                self.stats.unchanged += 1
+
+        updated = [product for products in to_update.values() for product in products]
+        try:
+            with transaction.atomic():
+                created = Product.objects.bulk_create(to_create, batch_size=self.batch_size)
+                if created and created[0].pk is None:
+                    # Backends that can't return ids from a bulk INSERT (MySQL)
+                    created = list(Product.objects.filter(name__in=[p.name for p in created]))
+                for fields, products in to_update.items():
+                    Product.objects.bulk_update(products, fields, batch_size=self.batch_size)
+
+                written = created + updated
+                get_backend().index_products(written)
+                enqueue_many('generate_product_images', [
+                    {'product_id': product.pk} for product in written if product.name in images
+                ])
+        except Exception:
+            # The images were stored ahead of the batch; don't leave them behind
+            for image in images.values():
+                default_storage.delete(image)
+            raise
+
+        self.stats.created += len(created)
+        self.stats.updated += len(updated)
+        self.log(f"imported {self.stats.created + self.stats.updated + self.stats.unchanged} products")
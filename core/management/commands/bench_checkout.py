@@ -0,0 +1,77 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Sum
+
+from core.checkout import OutOfStock, place_order
+from core.models import Order, OrderItem, Product, Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammers checkout on a single hot product from many threads and verifies "
+        "that no more units are sold than were in stock."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stock', type=int, default=100, help="Units of the hot product.")
+        parser.add_argument('--threads', type=int, default=16, help="Concurrent buyers.")
+        parser.add_argument('--attempts', type=int, default=25, help="Checkouts tried per thread.")
+        parser.add_argument('--quantity', type=int, default=1, help="Units per checkout.")
+
+    def handle(self, *args, **options):
+        stock, threads = options['stock'], options['threads']
+        attempts, quantity = options['attempts'], options['quantity']
+        tag = uuid.uuid4().hex[:8]
+
+        product = Product.objects.create(name=f"Benchmark hot product {tag}", price=Decimal('1.00'), stock=stock)
+        users = [User.objects.create_user(f"bench-checkout-{tag}-{i}") for i in range(threads)]
+        lines = [{'product': product, 'quantity': quantity, 'price': product.price}]
+
+        def buyer(user):
+            placed = sold_out = errors = 0
+            try:
+                for _ in range(attempts):
+                    try:
+                        place_order(user, lines)
+                        placed += 1
+                    except OutOfStock:
+                        sold_out += 1
+                    except OperationalError:
+                        # e.g. SQLite "database is locked" under heavy write contention
+                        errors += 1
+            finally:
+                connection.close()
+            return placed, sold_out, errors
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                results = list(pool.map(buyer, users))
+            elapsed = time.perf_counter() - started
+
+            placed, sold_out, errors = (sum(column) for column in zip(*results))
+            product.refresh_from_db()
+            units_sold = OrderItem.objects.filter(product=product).aggregate(total=Sum('quantity'))['total'] or 0
+
+            self.stdout.write(
+                f"{threads} threads x {attempts} attempts in {elapsed:.2f}s "
+                f"({(placed + sold_out + errors) / elapsed:.0f} checkouts/s)\n"
+                f"  orders placed: {placed}, rejected as sold out: {sold_out}, db errors: {errors}\n"
+                f"  units sold: {units_sold} of {stock}, stock left: {product.stock}"
+            )
+
+            if units_sold > stock or units_sold + product.stock != stock or units_sold != placed * quantity:
+                raise CommandError("Inventory mismatch: stock was oversold or lost.")
+            self.stdout.write(self.style.SUCCESS("No overselling detected."))
+        finally:
+            order_ids = list(Order.objects.filter(user__in=users).values_list('id', flat=True))
+            Task.objects.filter(name='send_order_confirmation', payload__order_id__in=order_ids).delete()
+            Order.objects.filter(user__in=users).delete()
+            product.delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
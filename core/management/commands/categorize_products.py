@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.categorizer import categorize_products, category_names
+
+
+class Command(BaseCommand):
+    help = "Assigns products to categories using the CategoryRule table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would change.")
+        parser.add_argument('--only-uncategorized', action='store_true', help="Skip products that have a category.")
+        parser.add_argument('--batch-size', type=int, default=None, help="Products classified per UPDATE.")
+
+    def handle(self, *args, **options):
+        result = categorize_products(
+            dry_run=options['dry_run'],
+            only_uncategorized=options['only_uncategorized'],
+            batch_size=options['batch_size'],
+        )
+
+        names = category_names(result.changes)
+        for change in result.changes:
+            old = names.get(change.old_category_id, 'Uncategorized')
+            self.stdout.write(f"  {change.product_id} {change.name}: {old} -> {names[change.new_category_id]}")
+
+        verb = "Would move" if options['dry_run'] else "Moved"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(result.changes)} of {result.checked} products; "
+            f"{result.unmatched} matched no rule."
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.cart import delete_abandoned_carts
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes anonymous database carts whose session no longer exists. "
+        "Run it periodically, e.g. right after `clearsessions`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Carts checked per query.")
+
+    def handle(self, *args, **options):
+        count = delete_abandoned_carts(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {count} abandoned carts."))
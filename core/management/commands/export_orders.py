@@ -0,0 +1,23 @@
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+
+from core.exports import export_orders
+from core.management.export import ExportCommand
+from core.models import Order
+
+
+class Command(ExportCommand):
+    help = "Writes all orders (or one user's) with their lines as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--user', help="Only this username's orders.")
+
+    def get_lines(self, file_format, options):
+        orders = Order.objects.all()
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user named {options['user']!r}")
+            orders = orders.filter(user=user)
+        return export_orders(file_format, orders)
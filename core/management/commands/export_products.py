@@ -0,0 +1,9 @@
+from core.exports import export_products
+from core.management.export import ExportCommand
+
+
+class Command(ExportCommand):
+    help = "Writes the whole catalog as NDJSON or CSV, streaming rows in chunks."
+
+    def get_lines(self, file_format, options):
+        return export_products(file_format)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.images import generate_variants
+from core.models import Product
+
+
+class Command(BaseCommand):
+    help = "Writes resized/WebP variants for product images that don't have them yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate variants that already exist.")
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        for product in Product.objects.exclude(image='').exclude(image__isnull=True).iterator():
+            try:
+                widths = generate_variants(product, force=options['force'])
+            except (OSError, ValueError) as exc:
+                # Missing or unreadable file: report it and carry on with the rest
+                self.stderr.write(f"{product.pk} {product.image.name}: {exc}")
+                failed += 1
+                continue
+            if widths:
+                done += 1
+                self.stdout.write(f"{product.image.name}: {', '.join(map(str, widths))}")
+
+        self.stdout.write(self.style.SUCCESS(f"Generated variants for {done} products ({failed} failed)."))
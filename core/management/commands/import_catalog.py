@@ -0,0 +1,40 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importer import CatalogImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports products from a CSV or JSON Lines file (columns: name, description, "
+        "price, category, stock, image). Products are matched by name; images may be "
+        "http(s) URLs, file:// URLs or paths relative to the file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (.csv) or JSON Lines file.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Override detection by extension.")
+        parser.add_argument('--batch-size', type=int, default=None, help="Products per bulk write.")
+        parser.add_argument('--workers', type=int, default=None, help="Concurrent image downloads.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.isfile(path):
+            raise CommandError(f"No such file: {path}")
+
+        importer = CatalogImporter(
+            base_dir=os.path.dirname(os.path.abspath(path)),
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            log=lambda message: self.stdout.write(message),
+        )
+        started = time.monotonic()
+        stats = importer.run(read_rows(path, options['format']))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {stats.created}, updated {stats.updated}, unchanged {stats.unchanged} "
+            f"in {time.monotonic() - started:.1f}s. Skipped {stats.duplicates} duplicate and "
+            f"{stats.invalid} invalid rows; {stats.images} images stored, {stats.image_errors} failed."
+        ))
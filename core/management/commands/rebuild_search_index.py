@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the full-text product search index from the Product table."
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {type(backend).__name__} index for {count} products."
+        ))
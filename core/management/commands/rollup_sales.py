@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from core.reports import reset_sales_rollups, rollup_sales
+
+
+class Command(BaseCommand):
+    help = "Adds orders placed since the last run to the daily sales rollup tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Order ids aggregated per transaction.")
+        parser.add_argument('--rebuild', action='store_true', help="Discard the rollups and recount every order.")
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            reset_sales_rollups()
+            self.stdout.write("Cleared sales rollups.")
+
+        count = rollup_sales(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rolled up {count} orders."))
@@ -0,0 +1,64 @@
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+
+from core.tasks import claim_tasks, purge_done_tasks, requeue_stale_tasks, run_task
+
+
+class Command(BaseCommand):
+    help = "Runs queued background tasks (order emails etc.) from the Task table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help="Tasks run concurrently.")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between polls when idle.")
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        threads, poll_interval = options['threads'], options['poll_interval']
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        done = failed = 0
+        running = set()
+        next_purge = time.monotonic()
+
+        self.stdout.write(f"Worker {worker_id} started with {threads} threads.")
+        try:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                while True:
+                    claimed = []
+                    if len(running) < threads:
+                        try:
+                            requeue_stale_tasks()
+                            claimed = claim_tasks(worker_id, threads - len(running))
+                        except OperationalError:
+                            # SQLite "database is locked": another writer got there first
+                            pass
+                    running.update(pool.submit(run_task, task) for task in claimed)
+
+                    if not running:
+                        if options['once']:
+                            break
+                        if time.monotonic() >= next_purge:
+                            # Idle: a good moment to drop old finished tasks
+                            try:
+                                purge_done_tasks()
+                                next_purge = time.monotonic() + settings.TASK_PURGE_INTERVAL
+                            except OperationalError:
+                                pass
+                        time.sleep(poll_interval)
+                        continue
+
+                    finished, running = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        if future.result():
+                            done += 1
+                        else:
+                            failed += 1
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping worker.")
+
+        self.stdout.write(self.style.SUCCESS(f"Tasks completed: {done}, failed attempts: {failed}."))
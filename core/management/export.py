@@ -0,0 +1,31 @@
+from abc import ABCMeta, abstractmethod
+
+from django.core.management.base import BaseCommand
+
+from core.exports import FORMATS
+
+
+class ExportCommand(BaseCommand, metaclass=ABCMeta):
+    """Shared --format/--output handling for the export_* commands."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(FORMATS), default='ndjson')
+        parser.add_argument('--output', '-o', help="File to write (default: stdout).")
+
+    @abstractmethod
+    def get_lines(self, file_format, options):
+        """Returns an iterator of output lines (each ending in a newline)."""
+
+    def handle(self, *args, **options):
+        lines = self.get_lines(options['format'], options)
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        count = 0
+        with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+            for line in lines:
+                f.write(line)
+                count += 1
+        self.stderr.write(self.style.SUCCESS(f"Wrote {count} lines to {options['output']}."))
@@ -0,0 +1,146 @@
+"""
+Serving of user-uploaded media (product images) in production.
+
+Replaces django.views.static.serve, which re-reads whole files on every
+request: files get strong ETags and Last-Modified for conditional requests,
+single byte ranges are honoured, content-hashed names are cached as
+immutable, and with MEDIA_OFFLOAD set the front-end server (nginx
+X-Accel-Redirect or Apache/lighttpd X-Sendfile) sends the bytes instead of
+a Python worker.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def file_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def cache_control(path):
+    if re.search(settings.MEDIA_IMMUTABLE_PATTERN, path):
+        return 'public, max-age=31536000, immutable'
+    return f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+
+def parse_range(header, size):
+    """
+    Returns (start, end) inclusive for a single `bytes=` range, None when the
+    header should be ignored (absent, malformed or multi-range, so the whole
+    file is sent) and raises ValueError when the range is unsatisfiable.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    """A Range only applies if If-Range (when sent) still names this version of the file."""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("Invalid media path")
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404("Media file not found")
+    if not os.path.isfile(full_path):
+        raise Http404("Media file not found")
+
+    etag = file_etag(stat)
+    last_modified = int(stat.st_mtime)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Cache-Control': cache_control(path),
+        'Accept-Ranges': 'bytes',
+    }
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        for header, value in headers.items():
+            not_modified.headers.setdefault(header, value)
+        return not_modified
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    if settings.MEDIA_OFFLOAD:
+        # The front-end server reads the file (and handles Range itself)
+        response = HttpResponse(content_type=content_type, headers=headers)
+        if settings.MEDIA_OFFLOAD == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = settings.MEDIA_OFFLOAD_PREFIX + quote(path)
+        else:
+            response['X-Sendfile'] = full_path
+        return response
+
+    size = stat.st_size
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except ValueError:
+        return HttpResponse(status=416, headers={'Content-Range': f'bytes */{size}', **headers})
+    if byte_range and not if_range_matches(request, etag, last_modified):
+        byte_range = None
+
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type, headers=headers)
+    else:
+        response = StreamingHttpResponse(
+            read_range(full_path, start, length), content_type=content_type, headers=headers,
+        )
+    response['Content-Length'] = str(length)
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,177 @@
+import hashlib
+import re
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.contrib.messages.storage.session import SessionStorage
+from django.core.cache import cache, caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from .catalog import CATEGORY_VERSION_KEY, get_category_version
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    caches[settings.USER_CACHE_ALIAS].delete(user_cache_key(user_id))
+
+
+def get_cached_user(request):
+    """
+    Returns the session's user from the cache, falling back to Django's own
+    get_user() (one auth_user query plus session verification) on a miss.
+
+    Entries are stored per user id together with the user's password-hash
+    fingerprint (get_session_auth_hash). A hit only counts if that fingerprint
+    matches the one recorded in the session at login, so sessions from before
+    a password change never get the cached user.
+    """
+    session = request.session
+    user_id = session.get(SESSION_KEY)
+    backend_path = session.get(BACKEND_SESSION_KEY)
+    session_hash = session.get(HASH_SESSION_KEY)
+    if user_id is None or not session_hash or backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return get_user(request)
+
+    cache = caches[settings.USER_CACHE_ALIAS]
+    key = user_cache_key(user_id)
+    cached = cache.get(key)
+    if cached is not None:
+        fingerprint, user = cached
+        if constant_time_compare(fingerprint, session_hash):
+            user.backend = backend_path
+            return user
+
+    user = get_user(request)
+    if user.is_authenticated:
+        cache.set(key, (user.get_session_auth_hash(), user), settings.USER_CACHE_TIMEOUT)
+    return user
+
+
+class CachedUserMiddleware:
+    """
+    Replaces the request.user set by AuthenticationMiddleware with one loaded
+    through get_cached_user, so authenticated requests skip the auth_user query.
+
+    Opt-in with USER_CACHE_ENABLED. User saves and deletes invalidate the entry
+    (see core/signals.py), which only reaches other processes when
+    USER_CACHE_ALIAS is a shared cache such as Redis or Memcached.
+    """
+
+    def __init__(self, get_response):
+        if not settings.USER_CACHE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.user = SimpleLazyObject(lambda: get_cached_user(request))
+        return self.get_response(request)
+
+
+# --- ANONYMOUS PAGE CACHE ---
+
+CSRF_INPUT_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = b'__page_cache_csrf_token__'
+
+
+def normalized_query(request):
+    """The query string sorted, with tracking parameters (utm_*, fbclid ...) dropped."""
+    params = sorted(
+        (key, value)
+        for key, values in request.GET.lists()
+        for value in values
+        if not key.startswith('utm_') and key not in settings.PAGE_CACHE_IGNORED_PARAMS
+    )
+    return urlencode(params)
+
+
+def page_cache_key(request):
+    url = f'{request.get_host()}{request.path}?{normalized_query(request)}'
+    return f'pagecache:{hashlib.md5(url.encode()).hexdigest()}'
+
+
+def has_visitor_state(request):
+    """True for visitors whose page isn't the generic one: a cart, or flash messages waiting."""
+    session = request.session
+    return bool(
+        session.get(settings.CART_ID_SESSION_KEY)
+        or session.get(settings.CART_SESSION_ID)
+        or SessionStorage.session_key in session
+        or CookieStorage.cookie_name in request.COOKIES
+    )
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Serves the catalog pages (PAGE_CACHE_URL_NAMES) to anonymous visitors from
+    a whole-page cache. Logged-in users, visitors with a cart or pending
+    messages, and anything but a plain GET always get a fresh render.
+
+    Each page is stored with the catalog version it was rendered under and is
+    read together with the current version in one get_many, so a hit is a
+    single cache round trip. Product/Category writes change the version (see
+    core/signals.py), which retires every stored page at once.
+
+    Pages carry CSRF tokens for their add-to-cart forms, so the token is swapped
+    for a placeholder before storing and a token for the current visitor is put
+    back when the page is served. Must come after the session, CSRF, auth and
+    messages middleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PAGE_CACHE_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        pending = getattr(request, '_page_cache_pending', None)
+        if pending is not None and self.can_store(request, response):
+            key, version = pending
+            content = CSRF_INPUT_RE.sub(rb'\1' + CSRF_PLACEHOLDER + rb'\2', response.content)
+            cache.set(key, (version, content, response['Content-Type']), settings.PAGE_CACHE_TIMEOUT)
+            response['X-Page-Cache'] = 'miss'
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        if (
+            request.method != 'GET'
+            or match is None
+            or match.url_name not in settings.PAGE_CACHE_URL_NAMES
+            or request.user.is_authenticated
+            or has_visitor_state(request)
+        ):
+            return None
+
+        key = page_cache_key(request)
+        found = cache.get_many([CATEGORY_VERSION_KEY, key])
+        version, cached = found.get(CATEGORY_VERSION_KEY), found.get(key)
+        if version is None or cached is None or cached[0] != version:
+            # Tagged with the version read before rendering: a catalog write
+            # made meanwhile leaves the stored page already retired
+            request._page_cache_pending = (key, version or get_category_version())
+            return None
+
+        _, content, content_type = cached
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+        response = HttpResponse(content, content_type=content_type)
+        response['X-Page-Cache'] = 'hit'
+        return response
+
+    def can_store(self, request, response):
+        if response.status_code != 200 or response.streaming:
+            return False
+        # The render started a session (e.g. a cart) or queued a message: not generic
+        if request.session.modified or settings.SESSION_COOKIE_NAME in response.cookies:
+            return False
+        messages = getattr(request, '_messages', None)
+        return not (messages is not None and messages._queued_messages)
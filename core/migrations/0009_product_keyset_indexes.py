@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_savedcard_savedupi'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-created_at', '-id'], name='product_newest_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', '-created_at', '-id'], name='product_category_newest_idx'),
+        ),
+    ]
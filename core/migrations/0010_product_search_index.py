@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_product_fts USING fts5("
+    "name, description, tokenize = 'porter unicode61 remove_diacritics 2')",
+    "INSERT INTO core_product_fts (rowid, name, description) "
+    "SELECT id, name, description FROM core_product",
+]
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS core_product_fts",
+]
+
+POSTGRES_FORWARD = [
+    "ALTER TABLE core_product ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')) STORED",
+    "CREATE INDEX core_product_search_vector_idx ON core_product USING GIN (search_vector)",
+]
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS core_product_search_vector_idx",
+    "ALTER TABLE core_product DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_for_vendor(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            run_for_vendor({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
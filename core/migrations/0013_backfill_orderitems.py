@@ -0,0 +1,61 @@
+import re
+from decimal import Decimal
+
+from django.db import migrations
+
+# Lines were written by process_payment as "<quantity>x <product name>"
+LINE_RE = re.compile(r'^\s*(\d+)x\s+(.+?)\s*$')
+
+
+def parse_product_names(product_names):
+    lines = []
+    for raw in product_names.splitlines():
+        if not raw.strip():
+            continue
+        match = LINE_RE.match(raw)
+        if match:
+            lines.append((int(match.group(1)), match.group(2)))
+        else:
+            lines.append((1, raw.strip()))
+    return lines
+
+
+def backfill_order_items(apps, schema_editor):
+    Order = apps.get_model('core', 'Order')
+    OrderItem = apps.get_model('core', 'OrderItem')
+    Product = apps.get_model('core', 'Product')
+
+    products = {}
+    for pk, name, price in Product.objects.values_list('id', 'name', 'price'):
+        products.setdefault(name, (pk, price))
+
+    batch = []
+    for order in Order.objects.filter(items__isnull=True).iterator():
+        lines = parse_product_names(order.product_names)
+        for quantity, name in lines:
+            product_id, price = products.get(name, (None, None))
+            if len(lines) == 1:
+                # A single line means the order total is exactly its price
+                price = order.total_price / quantity
+            batch.append(OrderItem(
+                order_id=order.id,
+                product_id=product_id,
+                product_name=name[:200],
+                quantity=quantity,
+                unit_price=(price or Decimal('0.00')).quantize(Decimal('0.01')),
+            ))
+        if len(batch) >= 1000:
+            OrderItem.objects.bulk_create(batch)
+            batch = []
+    OrderItem.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_orderitem'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_order_items, migrations.RunPython.noop),
+    ]
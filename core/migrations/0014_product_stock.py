@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_backfill_orderitems'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='stock',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
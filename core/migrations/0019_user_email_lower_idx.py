@@ -0,0 +1,28 @@
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+# auth.User belongs to django.contrib.auth, so the index is added through the
+# schema editor (which emits the right functional-index SQL per database)
+# rather than as a model Meta option.
+EMAIL_LOWER_INDEX = models.Index(Lower('email'), name='auth_user_email_lower_idx')
+
+
+def add_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('auth', 'User'), EMAIL_LOWER_INDEX)
+
+
+def remove_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('auth', 'User'), EMAIL_LOWER_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0018_sales_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+# One account per email address, compared case-insensitively. Blank emails
+# (e.g. superusers created without one) are exempt. Partial unique indexes
+# are skipped on MySQL, where register_view's IntegrityError mapping then only
+# sees username clashes. Existing duplicate emails must be cleaned up before
+# this migration can apply.
+EMAIL_UNIQUE = models.UniqueConstraint(
+    Lower('email'), condition=~models.Q(email=''), name='auth_user_email_lower_uniq',
+)
+
+
+def add_constraint(apps, schema_editor):
+    schema_editor.add_constraint(apps.get_model('auth', 'User'), EMAIL_UNIQUE)
+
+
+def remove_constraint(apps, schema_editor):
+    schema_editor.remove_constraint(apps.get_model('auth', 'User'), EMAIL_UNIQUE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_user_email_lower_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_constraint, remove_constraint),
+    ]
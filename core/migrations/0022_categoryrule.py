@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_product_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pattern', models.CharField(max_length=200)),
+                ('match_type', models.CharField(choices=[('keyword', 'Keyword (case-insensitive substring)'), ('regex', 'Regular expression (case-insensitive)')], default='keyword', max_length=10)),
+                ('priority', models.PositiveIntegerField(default=100)),
+                ('is_active', models.BooleanField(default=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rules', to='core.category')),
+            ],
+            options={
+                'ordering': ['priority', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_categoryrule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='session_key',
+            field=models.CharField(blank=True, db_index=True, max_length=40, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+# The unique lower(email) index from 0020 serves email logins too, so the
+# plain one from 0019 only costs writes. Databases without partial indexes
+# (MySQL) never got the unique index and keep this one.
+EMAIL_LOWER_INDEX = models.Index(Lower('email'), name='auth_user_email_lower_idx')
+
+
+def remove_index(apps, schema_editor):
+    if schema_editor.connection.features.supports_partial_indexes:
+        schema_editor.remove_index(apps.get_model('auth', 'User'), EMAIL_LOWER_INDEX)
+
+
+def add_index(apps, schema_editor):
+    if schema_editor.connection.features.supports_partial_indexes:
+        schema_editor.add_index(apps.get_model('auth', 'User'), EMAIL_LOWER_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_shoppingcart_session_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_index, add_index),
+    ]
@@ -1,5 +1,9 @@
+import re
+
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
@@ -22,19 +26,80 @@ class Product(models.Model):
     description = models.TextField(blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    # Resized copies of `image` written by core/images.py: {'source', 'ext', 'widths', ...}
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Units available to sell; empty means stock is not tracked for this product
+    stock = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks on (created_at, id), optionally within a category
+            models.Index(fields=['-created_at', '-id'], name='product_newest_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], name='product_category_newest_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
+class ShoppingCart(models.Model):
+    """Server-side cart. Anonymous carts have no user and are found via the session."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True, related_name='shopping_cart')
+    # Session an anonymous cart belongs to, so abandoned carts can be found once
+    # it's gone (empty for signed-cookie sessions, which the server doesn't keep)
+    session_key = models.CharField(max_length=40, null=True, blank=True, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Cart {self.id} ({self.user.username if self.user else 'anonymous'})"
+
+class CartItem(models.Model):
+    cart = models.ForeignKey(ShoppingCart, on_delete=models.CASCADE, related_name='items')
+    # Deleting a product drops it from every cart, so no ghost items here
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=1)
+    price = models.DecimalField(max_digits=10, decimal_places=2)  # price when first added
+
+    class Meta:
+        unique_together = ('cart', 'product')
+
+    def __str__(self):
+        return f"{self.quantity}x {self.product.name}"
+
 class Order(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     product_names = models.TextField(default='')
     total_price = models.DecimalField(max_digits=10, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Token issued with the payment form; a resubmitted form finds its order by it
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'idempotency_key'], name='order_user_idempotency_key'),
+        ]
+        indexes = [
+            # Order history and the dashboard summary read one user's orders newest-first
+            models.Index(fields=['user', '-created_at', '-id'], name='order_user_newest_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.id} by {self.user.username}"
+
+class OrderItem(models.Model):
+    """One line of an order, with the name and price captured at checkout."""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='order_items')
+    product_name = models.CharField(max_length=200)
+    quantity = models.PositiveIntegerField(default=1)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    @property
+    def total_price(self):
+        return self.unit_price * self.quantity
+
+    def __str__(self):
+        return f"{self.quantity}x {self.product_name}"
     
 class Wishlist(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -98,4 +163,129 @@ class SavedUPI(models.Model):
         return self.upi_id
 
     class Meta:
-        verbose_name_plural = "Saved UPI IDs"
\ No newline at end of file
+        verbose_name_plural = "Saved UPI IDs"
+
+class Task(models.Model):
+    """A unit of background work, run by `manage.py run_worker` (see core/tasks.py)."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Workers poll for status='pending' AND run_at <= now, oldest first
+            models.Index(fields=['status', 'run_at'], name='task_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.id} ({self.status})"
+
+# --- SALES ROLLUPS ---
+# Maintained by `manage.py rollup_sales` (see core/reports.py); never written by views.
+
+class DailySales(models.Model):
+    """Store-wide totals for one day."""
+    date = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name_plural = "Daily sales"
+
+    def __str__(self):
+        return f"{self.date}: ₹{self.revenue}"
+
+class DailyCategorySales(models.Model):
+    """Units and revenue for one category on one day (null category = uncategorized/deleted)."""
+    date = models.DateField()
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='daily_sales')
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-date', 'category']
+        verbose_name_plural = "Daily category sales"
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'category'], name='daily_category_sales_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.category}: ₹{self.revenue}"
+
+class DailyProductSales(models.Model):
+    """Units and revenue for one product on one day."""
+    date = models.DateField()
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='daily_sales')
+    product_name = models.CharField(max_length=200)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['-date', '-revenue']
+        verbose_name_plural = "Daily product sales"
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'product'], name='daily_product_sales_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.product_name}: ₹{self.revenue}"
+
+class RollupMark(models.Model):
+    """High-water mark of a rollup: the last Order id already folded into its tables."""
+    name = models.CharField(max_length=50, unique=True)
+    last_order_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ order {self.last_order_id}"
+
+class CategoryRule(models.Model):
+    """
+    Assigns products to a category by name. Rules are tried in priority order
+    (lowest first) by `manage.py categorize_products`; the first match wins.
+    """
+    KEYWORD = 'keyword'
+    REGEX = 'regex'
+    MATCH_CHOICES = [
+        (KEYWORD, 'Keyword (case-insensitive substring)'),
+        (REGEX, 'Regular expression (case-insensitive)'),
+    ]
+
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='rules')
+    pattern = models.CharField(max_length=200)
+    match_type = models.CharField(max_length=10, choices=MATCH_CHOICES, default=KEYWORD)
+    priority = models.PositiveIntegerField(default=100)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['priority', 'id']
+
+    def clean(self):
+        if self.match_type == self.REGEX:
+            try:
+                re.compile(self.pattern)
+            except re.error as exc:
+                raise ValidationError({'pattern': f"Invalid regular expression: {exc}"})
+
+    def __str__(self):
+        return f"{self.pattern} → {self.category}"
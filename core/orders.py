@@ -0,0 +1,36 @@
+"""
+Per-user order history helpers.
+
+The dashboard shows a summary of the user's orders (count, lifetime spend,
+last order date). It is computed with one aggregate over the (user,
+created_at) index and cached under one key per user, so a dashboard load is
+a single cache read. The Order signals in core/signals.py delete the entry
+whenever one of the user's orders is placed, edited or deleted.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+
+from .models import Order
+
+
+def order_summary_key(user_id):
+    return f'orders:summary:{user_id}'
+
+
+def get_order_summary(user):
+    """Returns {'count', 'lifetime_spend', 'last_order_at'} for the user's orders."""
+    key = order_summary_key(user.pk)
+    summary = cache.get(key)
+    if summary is None:
+        summary = Order.objects.filter(user=user).aggregate(
+            count=Count('id'),
+            lifetime_spend=Sum('total_price'),
+            last_order_at=Max('created_at'),
+        )
+        cache.set(key, summary, settings.ORDER_SUMMARY_CACHE_TIMEOUT)
+    return summary
+
+
+def invalidate_order_summary(user_id):
+    cache.delete(order_summary_key(user_id))
@@ -0,0 +1,138 @@
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor from the query string cannot be decoded."""
+
+
+def _pack(values):
+    raw = json.dumps(values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _unpack(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode()))
+
+
+def encode_cursor(obj):
+    """Packs a row's (created_at, id) sort key into an opaque URL-safe token."""
+    return _pack([obj.created_at.isoformat(), obj.id])
+
+
+def decode_cursor(cursor):
+    """Reverses encode_cursor. Returns a (created_at, id) tuple."""
+    try:
+        created_at, pk = _unpack(cursor)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+
+
+class KeysetPage:
+    """One page of rows plus the cursors needed to reach its neighbours."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def paginate_newest_first(queryset, after=None, before=None, page_size=None):
+    """
+    Slices a queryset (products, orders, ...) newest-first using keyset (seek)
+    pagination on its created_at and id columns.
+
+    Instead of OFFSET, each page filters on the (created_at, id) of the last row
+    the client saw, so the cost of a page is the same whether it is the first or
+    the thousandth. Pass `after` to move forward, `before` to move back.
+    """
+    page_size = page_size or settings.PRODUCTS_PAGE_SIZE
+
+    if before:
+        created_at, pk = decode_cursor(before)
+        rows = list(
+            queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+            .order_by('created_at', 'id')[:page_size + 1]
+        )
+        has_more = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        return KeysetPage(
+            rows,
+            next_cursor=encode_cursor(rows[-1]) if rows else None,
+            previous_cursor=encode_cursor(rows[0]) if rows and has_more else None,
+        )
+
+    if after:
+        created_at, pk = decode_cursor(after)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    rows = list(queryset.order_by('-created_at', '-id')[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    return KeysetPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1]) if rows and has_more else None,
+        previous_cursor=encode_cursor(rows[0]) if rows and after else None,
+    )
+
+
+def decode_position(cursor):
+    """Reverses the _pack([position]) cursors of paginate_ranked."""
+    try:
+        position = int(_unpack(cursor)[0])
+    except (ValueError, TypeError, IndexError, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+    if position < 0:
+        raise InvalidCursor(cursor)
+    return position
+
+
+def paginate_ranked(queryset, search, after=None, before=None, page_size=None):
+    """
+    Pages through relevance-ordered product ids (e.g. search hits).
+    `search(limit, offset)` returns the ids at those positions of the ranking,
+    best first, so only one page of hits is fetched however many there are.
+
+    Rank is not a column we can seek on, so the cursor is the position in the
+    ranking: `after` starts the page there and `before` ends the page there.
+    """
+    page_size = page_size or settings.PRODUCTS_PAGE_SIZE
+
+    if before:
+        end = decode_position(before)
+        start = max(end - page_size, 0)
+        page_ids = search(end - start, start)
+        has_more = True
+    else:
+        start = decode_position(after) if after else 0
+        page_ids = search(page_size + 1, start)
+        has_more = len(page_ids) > page_size
+        page_ids = page_ids[:page_size]
+
+    products = queryset.in_bulk(page_ids)
+    rows = [products[pk] for pk in page_ids if pk in products]
+    return KeysetPage(
+        rows,
+        next_cursor=_pack([start + len(page_ids)]) if page_ids and has_more else None,
+        previous_cursor=_pack([start]) if page_ids and start > 0 else None,
+    )
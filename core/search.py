@@ -0,0 +1,168 @@
+"""
+Full-text product search.
+
+The backend is picked from the vendor of the default database connection:
+
+* SQLite   -> an FTS5 virtual table (`core_product_fts`) keyed by product id,
+              kept in sync by the Product signals in core/signals.py.
+* Postgres -> a generated, weighted `tsvector` column on core_product with a
+              GIN index; the database keeps it in sync on its own.
+* anything else falls back to the old `icontains` scan.
+
+Backends return one page of hits at a time (LIMIT/OFFSET over the ranking),
+so every match stays reachable however broad the query. The tables/columns
+themselves are created by migration 0010.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Product
+
+FTS_TABLE = 'core_product_fts'
+
+# Restricts raw-SQL hits to one category (by slug) before LIMIT/OFFSET apply
+CATEGORY_FILTER = (
+    "IN (SELECT p.id FROM core_product p INNER JOIN core_category c ON c.id = p.category_id "
+    "WHERE c.slug = %s)"
+)
+
+
+def tokenize(query):
+    """Splits raw user input into plain word tokens, dropping any search syntax."""
+    return re.findall(r'\w+', query.lower())
+
+
+class LikeSearchBackend:
+    """Unindexed fallback for databases without a full-text engine wired up."""
+
+    def search(self, query, limit, offset=0, category=None):
+        search_query = Q()
+        for token in tokenize(query):
+            search_query &= Q(name__icontains=token) | Q(description__icontains=token)
+        if category:
+            search_query &= Q(category__slug=category)
+        products = Product.objects.filter(search_query).order_by('-created_at', '-id')
+        return list(products.values_list('id', flat=True)[offset:offset + limit])
+
+    def index_product(self, product):
+        pass
+
+    def index_products(self, products):
+        pass
+
+    def remove_product(self, product_id):
+        pass
+
+    def rebuild(self):
+        return Product.objects.count()
+
+
+class SQLiteSearchBackend:
+    """SQLite FTS5, ranked with bm25 (name matches weigh 10x description matches)."""
+
+    def search(self, query, limit, offset=0, category=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Every token must match, each as a prefix so "iph" finds "iphone"
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        where, params = f"{FTS_TABLE} MATCH %s", [match]
+        if category:
+            where += f" AND rowid {CATEGORY_FILTER}"
+            params.append(category)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {where} "
+                f"ORDER BY bm25({FTS_TABLE}, 10.0, 1.0), rowid DESC LIMIT %s OFFSET %s",
+                params + [limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index_product(self, product):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (%s, %s, %s)",
+                [product.pk, product.name, product.description],
+            )
+
+    def index_products(self, products):
+        """Bulk version of index_product for writes that bypass signals (bulk_create/update)."""
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [[p.pk] for p in products])
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (%s, %s, %s)",
+                [[p.pk, p.name, p.description] for p in products],
+            )
+
+    def remove_product(self, product_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description) "
+                f"SELECT id, name, description FROM core_product"
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        return Product.objects.count()
+
+
+class PostgresSearchBackend:
+    """Postgres tsvector/GIN, ranked with ts_rank over the A/B weighted vector."""
+
+    def search(self, query, limit, offset=0, category=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        ts_query = ' & '.join(f'{token}:*' for token in tokens)
+        where, params = "search_vector @@ query", [ts_query]
+        if category:
+            where += f" AND id {CATEGORY_FILTER}"
+            params.append(category)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT id FROM core_product, to_tsquery('english', %s) AS query "
+                f"WHERE {where} "
+                "ORDER BY ts_rank(search_vector, query) DESC, id DESC LIMIT %s OFFSET %s",
+                params + [limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def index_product(self, product):
+        # search_vector is a generated column; Postgres updates it with the row
+        pass
+
+    def index_products(self, products):
+        pass
+
+    def remove_product(self, product_id):
+        pass
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute("REINDEX INDEX core_product_search_vector_idx")
+        return Product.objects.count()
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend():
+    """Returns the search backend matching the default database."""
+    return BACKENDS.get(connection.vendor, LikeSearchBackend)()
+
+
+def search_product_ids(query, limit, offset=0, category=None):
+    """
+    Returns the ids of `limit` products matching `query` from `offset` on, best
+    match first, optionally only those in the category with slug `category`.
+    """
+    return get_backend().search(query, limit, offset, category)
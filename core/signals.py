@@ -0,0 +1,86 @@
+from django.db.models.signals import post_save, post_delete
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.dispatch import receiver
+
+from .catalog import bump_category_version, bump_deletion_generation
+from .images import has_current_variants
+from .models import Category, Order, Product
+from .middleware import invalidate_cached_user
+from .orders import invalidate_order_summary
+from .search import get_backend
+from .suggest import suggestion_index
+from .tasks import enqueue
+
+
+# --- SEARCH INDEX SYNC ---
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    get_backend().index_product(instance)
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    get_backend().remove_product(instance.pk)
+
+
+# --- SUGGESTION INDEX SYNC ---
+
+@receiver(post_save, sender=Product)
+def suggest_product(sender, instance, **kwargs):
+    suggestion_index.update('product', instance.pk, instance.name, instance.pk)
+
+@receiver(post_delete, sender=Product)
+def unsuggest_product(sender, instance, **kwargs):
+    suggestion_index.discard('product', instance.pk)
+
+@receiver(post_save, sender=Category)
+def suggest_category(sender, instance, **kwargs):
+    suggestion_index.update('category', instance.pk, instance.name, instance.slug)
+
+@receiver(post_delete, sender=Category)
+def unsuggest_category(sender, instance, **kwargs):
+    suggestion_index.discard('category', instance.pk)
+
+
+# --- CATEGORY NAVIGATION CACHE ---
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_nav_categories(sender, **kwargs):
+    # Product changes move the per-category counts, so they bump the version too
+    bump_category_version()
+
+
+# --- CART GHOST-ITEM GENERATION ---
+
+@receiver(post_delete, sender=Product)
+def bump_cart_generation(sender, **kwargs):
+    # Carts holding an older generation re-check their items on next load
+    bump_deletion_generation()
+
+
+# --- ORDER SUMMARY CACHE ---
+
+@receiver([post_save, post_delete], sender=Order)
+def invalidate_user_order_summary(sender, instance, **kwargs):
+    # Wait for the commit so a concurrent dashboard can't re-cache the old totals
+    transaction.on_commit(lambda: invalidate_order_summary(instance.user_id))
+
+
+# --- CACHED USER ---
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    # Covers account_settings_view (form.save()), password changes and logins
+    # (last_login); queryset .update() calls must invalidate by hand
+    transaction.on_commit(lambda: invalidate_cached_user(instance.pk))
+
+
+# --- PRODUCT IMAGE VARIANTS ---
+
+@receiver(post_save, sender=Product)
+def queue_image_variants(sender, instance, **kwargs):
+    # Resizing is too slow for the admin request; the worker does it
+    if instance.image and not has_current_variants(instance):
+        transaction.on_commit(lambda: enqueue('generate_product_images', product_id=instance.pk))
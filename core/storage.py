@@ -0,0 +1,44 @@
+"""
+Media storage that names every file after its content.
+
+HashedFileSystemStorage saves 'products/shoe.jpg' as
+'products/shoe.0123456789ab.jpg' (the first 12 hex digits of the file's MD5),
+so a name only ever refers to one version of a file and core.media can let
+browsers cache it for a year (MEDIA_IMMUTABLE_PATTERN). When the name is
+taken, Django's usual random suffix goes before the hash, keeping it last.
+"""
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASH_LENGTH = 12
+HASH_SUFFIX_RE = re.compile(r'\.[0-9a-f]{%d}$' % HASH_LENGTH)
+
+
+def content_hash(content):
+    hasher = hashlib.md5(usedforsecurity=False)
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    return hasher.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(name, content):
+    root, ext = os.path.splitext(name)
+    return f'{root}.{content_hash(content)}{ext}'
+
+
+def strip_hash(root):
+    """'shoe.0123456789ab' -> 'shoe'."""
+    return HASH_SUFFIX_RE.sub('', root)
+
+
+class HashedFileSystemStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        return super().save(hashed_name(name, content), content, max_length=max_length)
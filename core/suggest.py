@@ -0,0 +1,144 @@
+"""
+Search-as-you-type suggestions served from memory.
+
+Each process keeps a sorted list of (term, kind, id) keys, where every word of
+a product or category name contributes one term, so "pro" finds both "Pro
+Football" and "iPhone 17 Pro Max". A lookup is a bisect to the first key >= the
+prefix followed by a short forward scan, so it never touches the database once
+the index is loaded. The index is built lazily on first use, patched in place
+by the Product/Category signals in core/signals.py, and rebuilt once it is
+older than SEARCH_SUGGEST_REFRESH seconds to pick up writes made by other
+processes or without signals (bulk imports, the categorizer). Result URLs are
+only reversed for the suggestions actually returned.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.urls import NoReverseMatch, reverse
+
+from .models import Category, Product
+
+
+def normalize(text):
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+def name_terms(name):
+    """Every word-aligned suffix of a name: 'iphone 17 pro' -> 'iphone 17 pro', '17 pro', 'pro'."""
+    words = normalize(name).split()
+    return {' '.join(words[i:]) for i in range(len(words))}
+
+
+def suggestion_url(kind, key):
+    """key is the category slug or the product id."""
+    if kind == 'category':
+        return reverse('category_detail', args=[key])
+    return reverse('product_detail', args=[key])
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._keys = []      # sorted (term, kind, pk)
+        self._entries = {}   # (kind, pk) -> {'type', 'label', 'key', 'terms'}
+        self._lock = threading.Lock()
+        self._loaded_at = None
+
+    @property
+    def _loaded(self):
+        return self._loaded_at is not None
+
+    def _is_stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > settings.SEARCH_SUGGEST_REFRESH
+
+    def _load(self):
+        # Built into fresh containers and swapped in, so lookups running
+        # meanwhile keep using the previous index
+        with self._lock:
+            if not self._is_stale():
+                return
+            keys, entries = [], {}
+            for pk, name, slug in Category.objects.values_list('id', 'name', 'slug'):
+                keys.extend(self._store(entries, 'category', pk, name, slug))
+            for pk, name in Product.objects.values_list('id', 'name'):
+                keys.extend(self._store(entries, 'product', pk, name, pk))
+            keys.sort()
+            self._keys, self._entries = keys, entries
+            self._loaded_at = time.monotonic()
+
+    def _store(self, entries, kind, pk, label, key):
+        terms = name_terms(label)
+        entries[(kind, pk)] = {'type': kind, 'label': label, 'key': key, 'terms': terms}
+        return [(term, kind, pk) for term in terms]
+
+    def _remove(self, keys, entries, kind, pk):
+        entry = entries.pop((kind, pk), None)
+        if entry is None:
+            return
+        for term in entry['terms']:
+            i = bisect_left(keys, (term, kind, pk))
+            if i < len(keys) and keys[i] == (term, kind, pk):
+                del keys[i]
+
+    # Writers patch a copy and swap it in, so lookups never see a list mid-edit
+    # and don't need the lock.
+
+    def update(self, kind, pk, label, key):
+        """
+        Adds or re-indexes one entry (key: category slug or product id). A no-op
+        until the index has been loaded.
+        """
+        with self._lock:
+            if not self._loaded:
+                return
+            keys, entries = list(self._keys), dict(self._entries)
+            self._remove(keys, entries, kind, pk)
+            for index_key in self._store(entries, kind, pk, label, key):
+                insort(keys, index_key)
+            self._keys, self._entries = keys, entries
+
+    def discard(self, kind, pk):
+        with self._lock:
+            if not self._loaded:
+                return
+            keys, entries = list(self._keys), dict(self._entries)
+            self._remove(keys, entries, kind, pk)
+            self._keys, self._entries = keys, entries
+
+    def lookup(self, prefix, limit):
+        """Returns up to `limit` suggestions whose name has a word starting with `prefix`."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        if self._is_stale():
+            self._load()
+
+        keys, entries = self._keys, self._entries
+        results, seen = [], set()
+        i = bisect_left(keys, (prefix,))
+        while i < len(keys) and len(results) < limit:
+            term, kind, pk = keys[i]
+            if not term.startswith(prefix):
+                break
+            if (kind, pk) not in seen:
+                seen.add((kind, pk))
+                entry = entries.get((kind, pk))
+                try:
+                    if entry is not None:
+                        results.append({
+                            'type': entry['type'], 'label': entry['label'],
+                            'url': suggestion_url(kind, entry['key']),
+                        })
+                except NoReverseMatch:
+                    pass  # e.g. a category slug that isn't URL-safe has no page to link to
+            i += 1
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._keys, self._entries, self._loaded_at = [], {}, None
+
+
+suggestion_index = PrefixIndex()
@@ -0,0 +1,168 @@
+"""
+A small durable task queue stored in the Task table.
+
+Request code calls `enqueue('name', **payload)`; `manage.py run_worker`
+claims due tasks, runs their handlers in a thread pool and retries failures
+with exponential backoff. Handlers are plain functions registered with
+`@task('name')` at the bottom of this module.
+"""
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .images import generate_variants
+from .models import Order, Product, Task
+
+logger = logging.getLogger(__name__)
+
+TASK_HANDLERS = {}
+
+
+def task(name):
+    """Registers the decorated function as the handler for tasks called `name`."""
+    def register(func):
+        TASK_HANDLERS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, delay=None, **payload):
+    """Stores a task to run as soon as a worker is free (or after `delay` seconds)."""
+    run_at = timezone.now() + timedelta(seconds=delay) if delay else timezone.now()
+    return Task.objects.create(
+        name=name,
+        payload=payload,
+        run_at=run_at,
+        max_attempts=settings.TASK_MAX_ATTEMPTS,
+    )
+
+
+def enqueue_many(name, payloads):
+    """Stores one task per payload dict with a single bulk INSERT."""
+    now = timezone.now()
+    return Task.objects.bulk_create([
+        Task(name=name, payload=payload, run_at=now, max_attempts=settings.TASK_MAX_ATTEMPTS)
+        for payload in payloads
+    ])
+
+
+def requeue_stale_tasks():
+    """
+    Hands tasks from crashed workers back to the queue after TASK_LOCK_TIMEOUT.
+    The lost run counts as an attempt, so a task that keeps taking its worker
+    down is marked failed after max_attempts instead of looping forever.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.TASK_LOCK_TIMEOUT)
+    stale = Task.objects.filter(status=Task.RUNNING, locked_at__lt=cutoff)
+    lost = {'attempts': F('attempts') + 1, 'locked_by': '', 'last_error': "Worker stopped while running the task."}
+    stale.filter(attempts__gte=F('max_attempts') - 1).update(status=Task.FAILED, **lost)
+    return stale.update(status=Task.PENDING, **lost)
+
+
+def purge_done_tasks(batch_size=1000):
+    """
+    Deletes finished tasks older than TASK_DONE_RETENTION seconds (failed ones
+    are kept for inspection). Goes by run_at so task_ready_idx finds them; a
+    done task ran at or after that time. Returns the number deleted.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.TASK_DONE_RETENTION)
+    old = Task.objects.filter(status=Task.DONE, run_at__lt=cutoff)
+    deleted = 0
+    while True:
+        ids = list(old.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += Task.objects.filter(id__in=ids).delete()[0]
+
+
+def claim_tasks(worker_id, limit):
+    """
+    Marks up to `limit` due tasks as running for this worker and returns them.
+
+    On databases with row locks the candidates are selected FOR UPDATE SKIP
+    LOCKED, so concurrent workers each get a disjoint batch without waiting.
+    SQLite has no row locks (writers are serialized anyway), so there the
+    conditional status='pending' UPDATE alone decides who owns a task.
+    """
+    now = timezone.now()
+    claim_id = f'{worker_id}:{uuid.uuid4().hex[:8]}'
+
+    with transaction.atomic():
+        due = Task.objects.filter(status=Task.PENDING, run_at__lte=now).order_by('run_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        Task.objects.filter(id__in=ids, status=Task.PENDING).update(
+            status=Task.RUNNING, locked_by=claim_id, locked_at=now,
+        )
+
+    return list(Task.objects.filter(locked_by=claim_id, status=Task.RUNNING))
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base ... capped at one hour."""
+    return min(settings.TASK_RETRY_BACKOFF * 2 ** (attempts - 1), 60 * 60)
+
+
+def run_task(task_obj):
+    """Runs one claimed task and records the outcome. Never raises."""
+    attempts = task_obj.attempts + 1
+    try:
+        try:
+            TASK_HANDLERS[task_obj.name](**task_obj.payload)
+        except Exception:
+            logger.warning("Task %s failed (attempt %s/%s)", task_obj, attempts, task_obj.max_attempts)
+            if attempts >= task_obj.max_attempts:
+                updates = {'status': Task.FAILED}
+            else:
+                updates = {
+                    'status': Task.PENDING,
+                    'run_at': timezone.now() + timedelta(seconds=retry_delay(attempts)),
+                }
+            Task.objects.filter(pk=task_obj.pk).update(
+                attempts=attempts, last_error=traceback.format_exc(), locked_by='', **updates,
+            )
+            return False
+
+        Task.objects.filter(pk=task_obj.pk).update(status=Task.DONE, attempts=attempts, locked_by='')
+        return True
+    finally:
+        # Each pool thread has its own connection; don't leave them open
+        connection.close()
+
+
+# --- TASK HANDLERS ---
+
+@task('send_order_confirmation')
+def send_order_confirmation(order_id):
+    order = Order.objects.select_related('user').prefetch_related('items').filter(pk=order_id).first()
+    if order is None or not order.user.email:
+        return
+
+    lines = '\n'.join(f"  {item.quantity}x {item.product_name}  ₹{item.total_price}" for item in order.items.all())
+    send_mail(
+        subject=f"Zestify order #{order.id} confirmed",
+        message=(
+            f"Hi {order.user.username},\n\n"
+            f"Thanks for shopping with Zestify! Your order #{order.id} is confirmed.\n\n"
+            f"{lines}\n\nTotal: ₹{order.total_price}\n"
+        ),
+        from_email=None,
+        recipient_list=[order.user.email],
+    )
+
+
+@task('generate_product_images')
+def generate_product_images(product_id):
+    product = Product.objects.filter(pk=product_id).first()
+    if product is not None:
+        generate_variants(product)
@@ -1,6 +1,9 @@
 # D:\Zestify\ecommerce\core\templatetags\custom_filters.py
 
 from django import template
+from django.utils.html import format_html
+
+from core.images import has_current_variants, variant_names
 
 register = template.Library()
 
@@ -24,3 +27,42 @@ def status_badge_class(status):
         return 'bg-warning text-dark'
 
 
+@register.simple_tag
+def product_image(product, sizes='100vw', css_class='', style='', eager=False):
+    """
+    Renders a product's image as a responsive, lazily loaded <picture>.
+    Usage: {% product_image product sizes="(min-width: 992px) 25vw, 100vw" %}
+
+    The browser picks the smallest WebP (or original-format) variant that
+    fills `sizes`; products whose variants aren't generated yet get the
+    original file.
+    """
+    if not product.image:
+        return ''
+
+    loading = 'eager' if eager else 'lazy'
+    if not has_current_variants(product) or not product.image_variants['widths']:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" style="{}" loading="{}" decoding="async">',
+            product.image.url, product.name, css_class, style, loading,
+        )
+
+    variants = product.image_variants
+    storage = product.image.storage
+
+    def srcset(ext, include_original):
+        entries = [
+            f"{storage.url(name)} {w}w" for name, w in zip(variant_names(variants, ext), variants['widths'])
+        ]
+        if include_original:
+            entries.append(f"{product.image.url} {variants['width']}w")
+        return ', '.join(entries)
+
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" style="{}" loading="{}" decoding="async">'
+        '</picture>',
+        srcset('webp', False), sizes,
+        product.image.url, srcset(variants['ext'], True), sizes, product.name, css_class, style, loading,
+    )
@@ -0,0 +1,108 @@
+from unittest import mock
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.db import IntegrityError
+from django.test import TestCase
+from django.urls import reverse
+
+from core.forms import AccountSettingsForm
+from core.views import duplicate_user_field
+
+
+def message_texts(response):
+    return [str(m) for m in get_messages(response.wsgi_request)]
+
+
+class RegisterTests(TestCase):
+    def register(self, username, email):
+        return self.client.post(reverse('user_register'), {
+            'username': username, 'email': email,
+            'password': 'pw-12345', 'confirm_password': 'pw-12345',
+        })
+
+    def test_duplicate_email_is_case_insensitive(self):
+        User.objects.create_user('alice', 'alice@example.com', 'pw')
+        response = self.register('alice2', 'ALICE@example.com')
+        self.assertRedirects(response, reverse('user_register'))
+        self.assertEqual(message_texts(response), ["That email is already in use."])
+        self.assertFalse(User.objects.filter(username='alice2').exists())
+
+    def test_duplicate_username(self):
+        User.objects.create_user('alice', 'alice@example.com', 'pw')
+        response = self.register('alice', 'other@example.com')
+        self.assertEqual(message_texts(response), ["That username is already taken."])
+
+    def test_unrelated_integrity_error_is_not_reported_as_a_duplicate(self):
+        self.assertIsNone(duplicate_user_field(IntegrityError('NOT NULL constraint failed: auth_user.password')))
+        with mock.patch.object(User.objects, 'create_user', side_effect=IntegrityError('something else')):
+            with self.assertRaises(IntegrityError):
+                self.register('bob', 'bob@example.com')
+
+
+class AccountSettingsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        User.objects.create_user('bob', 'bob@example.com', 'pw')
+
+    def post(self, email):
+        self.client.force_login(self.user)
+        return self.client.post(reverse('account_settings'), {
+            'username': 'alice', 'first_name': '', 'last_name': '', 'email': email,
+        })
+
+    def test_clean_email_rejects_another_accounts_email(self):
+        form = AccountSettingsForm({'username': 'alice', 'email': 'Bob@Example.com'}, instance=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn('email', form.errors)
+
+    def test_clean_email_allows_own_email_in_another_case(self):
+        form = AccountSettingsForm({'username': 'alice', 'email': 'ALICE@example.com'}, instance=self.user)
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_taken_email_shows_form_error(self):
+        response = self.post('BOB@example.com')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('email', response.context['form'].errors)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email, 'alice@example.com')
+
+    def test_race_on_save_shows_form_error(self):
+        # Another account takes the email between validation and save
+        with mock.patch.object(AccountSettingsForm, 'clean_email', lambda form: form.cleaned_data['email']):
+            response = self.post('bob@example.com')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['form'].errors['email'], ["That email is already in use."])
+
+
+class EmailOrUsernameBackendTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user('alice', 'Alice@Example.com', 'pw-alice')
+
+    def login(self, username, password):
+        return authenticate(None, username=username, password=password)
+
+    def test_username_login(self):
+        self.assertEqual(self.login('alice', 'pw-alice'), self.alice)
+
+    def test_email_login_is_case_insensitive(self):
+        self.assertEqual(self.login('alice@example.COM', 'pw-alice'), self.alice)
+
+    def test_email_login_takes_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.login('ALICE@example.com', 'pw-alice'), self.alice)
+
+    def test_exact_username_beats_another_accounts_email(self):
+        # Bob's username is Alice's email address
+        bob = User.objects.create_user('alice@example.com', 'bob@example.com', 'pw-bob')
+        self.assertEqual(self.login('alice@example.com', 'pw-bob'), bob)
+        self.assertIsNone(self.login('alice@example.com', 'pw-alice'))
+
+    def test_wrong_password_and_unknown_account(self):
+        self.assertIsNone(self.login('alice', 'nope'))
+        self.assertIsNone(self.login('nobody@example.com', 'pw-alice'))
+
+    def test_blank_email_never_matches(self):
+        User.objects.create_user('carol', '', 'pw-carol')
+        self.assertIsNone(self.login('@', 'pw-carol'))
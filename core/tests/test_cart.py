@@ -0,0 +1,193 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.cart import Cart, delete_abandoned_carts, get_request_cart
+from core.models import CartItem, Product, ShoppingCart
+
+
+def make_request(session=None):
+    request = RequestFactory().get('/')
+    if session is None:
+        SessionMiddleware(lambda r: None).process_request(request)
+    else:
+        request.session = session
+    request.user = AnonymousUser()
+    return request
+
+
+class DatabaseCartTests(TestCase):
+    def setUp(self):
+        self.product = Product.objects.create(name='Kettle', price=Decimal('10.00'))
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw-12345')
+
+    def add_to_cart(self, client=None):
+        return (client or self.client).post(reverse('cart_add', args=[self.product.id]))
+
+    def test_anonymous_cart_records_its_session(self):
+        self.add_to_cart()
+        cart = ShoppingCart.objects.get(user__isnull=True)
+        self.assertEqual(cart.session_key, self.client.session.session_key)
+
+    def test_login_merges_and_deletes_anonymous_cart(self):
+        self.add_to_cart()
+        self.client.post(reverse('login'), {'username': 'alice', 'password': 'pw-12345'})
+        self.assertFalse(ShoppingCart.objects.filter(user__isnull=True).exists())
+        self.assertEqual(CartItem.objects.get(cart__user=self.user).quantity, 1)
+
+    def test_abandoned_carts_are_deleted(self):
+        self.add_to_cart()
+        kept = self.client_class()
+        self.add_to_cart(kept)
+        # The first visitor's session expires
+        Session.objects.filter(session_key=self.client.session.session_key).update(
+            expire_date=timezone.now() - timedelta(seconds=1),
+        )
+        self.assertEqual(delete_abandoned_carts(), 1)
+        self.assertEqual(
+            list(ShoppingCart.objects.values_list('session_key', flat=True)), [kept.session.session_key],
+        )
+
+    def test_logged_in_carts_are_kept(self):
+        self.client.force_login(self.user)
+        self.add_to_cart()
+        self.client.logout()
+        self.assertEqual(delete_abandoned_carts(), 0)
+        self.assertTrue(ShoppingCart.objects.filter(user=self.user).exists())
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_cookie_session_carts_expire_by_age(self):
+        self.add_to_cart()
+        cart = ShoppingCart.objects.get()
+        self.assertIsNone(cart.session_key)
+        self.assertEqual(delete_abandoned_carts(), 0)
+        ShoppingCart.objects.update(created_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(delete_abandoned_carts(), 1)
+
+
+class AjaxContractTests(TestCase):
+    """What static/js/cart.js and wishlist.js rely on to tell a login redirect from other failures."""
+
+    def setUp(self):
+        self.product = Product.objects.create(name='Kettle', price=Decimal('10.00'))
+
+    def test_cart_add_answers_json(self):
+        response = self.client.post(reverse('cart_add', args=[self.product.id]), HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_bad_quantity_answers_a_json_error(self):
+        # Shown to the visitor as is; the form is not posted again
+        response = self.client.post(
+            reverse('cart_update', args=[self.product.id]), {'quantity': 'x'}, HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'A whole-number quantity is required.'})
+
+    def test_anonymous_wishlist_toggle_redirects_to_login(self):
+        # fetch(..., {redirect: 'manual'}) sees this as an opaqueredirect and submits the form
+        response = self.client.post(reverse('toggle_wishlist', args=[self.product.id]), HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith('/login/'))
+
+
+class CartMemoizationTests(TestCase):
+    def setUp(self):
+        self.products = [Product.objects.create(name=f'Item {n}', price=Decimal('2.50')) for n in range(3)]
+
+    def test_request_cart_is_built_once(self):
+        request = make_request()
+        self.assertIs(get_request_cart(request), get_request_cart(request))
+
+    def test_lines_and_total_share_one_product_query(self):
+        request = make_request()
+        cart = Cart(request)
+        for product in self.products:
+            cart.add(product, 2)
+        cart = Cart(request)
+        with self.assertNumQueries(1):
+            lines = list(cart)
+            list(cart)
+            total = cart.get_total_price()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(total, Decimal('15.00'))
+
+    def test_mutation_refreshes_the_lines(self):
+        cart = Cart(make_request())
+        cart.add(self.products[0])
+        self.assertEqual(cart.get_total_price(), Decimal('2.50'))
+        cart.add(self.products[0])
+        self.assertEqual(cart.get_total_price(), Decimal('5.00'))
+
+
+@override_settings(CART_STORAGE='core.cart.SessionCartStorage')
+class GhostItemTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.kettle = Product.objects.create(name='Kettle', price=Decimal('10.00'))
+        self.toaster = Product.objects.create(name='Toaster', price=Decimal('20.00'))
+        self.request = make_request()
+        cart = Cart(self.request)
+        cart.add(self.kettle)
+        cart.add(self.toaster)
+
+    def test_unchanged_catalog_skips_the_check(self):
+        Cart(self.request)  # validates once and records the generation
+        with self.assertNumQueries(0):
+            Cart(self.request)
+
+    def test_empty_cart_skips_the_check(self):
+        with self.assertNumQueries(0):
+            Cart(make_request())
+
+    def test_deleted_product_is_dropped(self):
+        Cart(self.request)
+        self.toaster.delete()
+        cart = Cart(self.request)
+        self.assertEqual(list(cart.cart), [str(self.kettle.id)])
+        self.assertEqual(list(self.request.session['cart']), [str(self.kettle.id)])
+
+
+class SessionWriteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.kettle = Product.objects.create(name='Kettle', price=Decimal('10.00'))
+
+    def settle(self, storage):
+        """A session that already holds a one-kettle cart and has been saved."""
+        with override_settings(CART_STORAGE=storage):
+            request = make_request()
+            Cart(request).set_quantity(self.kettle, 2)
+            Cart(request)  # the first load of a non-empty cart records the deletion generation
+            request.session.save()
+            request = make_request(request.session)
+            request.session.modified = False
+            return request
+
+    def assert_no_session_write(self, storage):
+        request = self.settle(storage)
+        with override_settings(CART_STORAGE=storage):
+            cart = Cart(request)
+            list(cart)
+            cart.set_quantity(self.kettle, 2)  # its current quantity
+        self.assertFalse(request.session.modified)
+
+    def test_session_storage_skips_unchanged_writes(self):
+        self.assert_no_session_write('core.cart.SessionCartStorage')
+
+    def test_cache_storage_skips_unchanged_writes(self):
+        self.assert_no_session_write('core.cart.CacheCartStorage')
+
+    def test_real_change_is_written(self):
+        request = self.settle('core.cart.SessionCartStorage')
+        with override_settings(CART_STORAGE='core.cart.SessionCartStorage'):
+            Cart(request).set_quantity(self.kettle, 3)
+        self.assertTrue(request.session.modified)
+        self.assertEqual(request.session['cart'][str(self.kettle.id)]['quantity'], 3)
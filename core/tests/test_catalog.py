@@ -0,0 +1,39 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.catalog import get_category_version, get_nav_categories
+from core.categorizer import categorize_products
+from core.models import Category, CategoryRule, Product
+
+
+class NavCategoriesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.phones = Category.objects.create(name='Phones')
+
+    def test_menu_is_served_from_cache(self):
+        get_nav_categories()
+        with self.assertNumQueries(0), mock.patch.object(cache, 'get', wraps=cache.get) as cache_get:
+            self.assertEqual([c.name for c in get_nav_categories()], ['Phones'])
+        self.assertEqual(cache_get.call_count, 1)
+
+    def test_product_save_refreshes_counts(self):
+        get_nav_categories()
+        Product.objects.create(name='Pixel', price=Decimal('1'), category=self.phones)
+        self.assertEqual(get_nav_categories()[0].product_count, 1)
+
+    def test_category_save_refreshes_menu(self):
+        get_nav_categories()
+        Category.objects.create(name='Laptops')
+        self.assertEqual([c.name for c in get_nav_categories()], ['Phones', 'Laptops'])
+
+    def test_categorizer_bumps_version(self):
+        Product.objects.create(name='Pixel phone', price=Decimal('1'))
+        CategoryRule.objects.create(category=self.phones, pattern='phone')
+        version = get_category_version()
+        categorize_products()
+        self.assertNotEqual(get_category_version(), version)
+        self.assertEqual(get_nav_categories()[0].product_count, 1)
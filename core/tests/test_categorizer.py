@@ -0,0 +1,68 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.categorizer import categorize_products
+from core.models import Category, CategoryRule, Product
+
+
+class CategorizerTests(TestCase):
+    def setUp(self):
+        self.phones = Category.objects.create(name='Phones')
+        self.cases = Category.objects.create(name='Cases')
+        CategoryRule.objects.create(category=self.cases, pattern='case', priority=10)
+        CategoryRule.objects.create(category=self.phones, pattern=r'\bphone\b', match_type=CategoryRule.REGEX)
+        CategoryRule.objects.create(category=self.phones, pattern='c++', priority=200)
+
+    def product(self, name, category=None):
+        return Product.objects.create(name=name, price=Decimal('1'), category=category)
+
+    def category_of(self, product):
+        product.refresh_from_db()
+        return product.category
+
+    def test_first_matching_rule_by_priority_wins(self):
+        case = self.product('Phone case')
+        phone = self.product('Smart phone')
+        other = self.product('Kettle')
+        result = categorize_products(batch_size=2)
+        self.assertEqual((self.category_of(case), self.category_of(phone), self.category_of(other)),
+                         (self.cases, self.phones, None))
+        self.assertEqual((result.checked, len(result.changes), result.unmatched), (3, 2, 1))
+
+    def test_keywords_are_literal(self):
+        book = self.product('Learn C++ today')
+        categorize_products()
+        self.assertEqual(self.category_of(book), self.phones)
+
+    def test_dry_run_writes_nothing(self):
+        phone = self.product('Smart phone')
+        result = categorize_products(dry_run=True)
+        self.assertEqual(len(result.changes), 1)
+        self.assertIsNone(self.category_of(phone))
+
+    def test_products_already_in_place_are_not_written(self):
+        self.product('Smart phone', category=self.phones)
+        with self.assertNumQueries(3):  # rules, one batch, the empty next batch
+            result = categorize_products()
+        self.assertEqual(result.changes, [])
+
+    def test_only_uncategorized(self):
+        phone = self.product('Phone case', category=self.phones)
+        categorize_products(only_uncategorized=True)
+        self.assertEqual(self.category_of(phone), self.phones)
+
+    def test_invalid_regex_is_rejected(self):
+        rule = CategoryRule(category=self.phones, pattern='(unclosed', match_type=CategoryRule.REGEX)
+        with self.assertRaises(ValidationError):
+            rule.full_clean()
+
+    def test_command_reports_moves(self):
+        self.product('Smart phone')
+        out = StringIO()
+        call_command('categorize_products', dry_run=True, stdout=out)
+        self.assertIn('Uncategorized -> Phones', out.getvalue())
+        self.assertIn('Would move 1 of 1 products', out.getvalue())
@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from django.urls import reverse
+
+from core.checkout import OutOfStock, place_order, reserve_stock
+from core.models import Order, OrderItem, Product, Task
+
+
+class CheckoutTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.kettle = Product.objects.create(name='Kettle', price=Decimal('10.00'), stock=5)
+        self.toaster = Product.objects.create(name='Toaster', price=Decimal('25.00'), stock=1)
+
+    def line(self, product, quantity, price=None):
+        return {'product': product, 'quantity': quantity, 'price': price or product.price}
+
+
+class PlaceOrderTests(CheckoutTestCase):
+    def test_order_lines_keep_name_and_price(self):
+        order = place_order(self.user, [self.line(self.kettle, 2), self.line(self.toaster, 1)])
+        self.assertEqual(order.total_price, Decimal('45.00'))
+        items = list(order.items.order_by('product_name').values_list('product_name', 'quantity', 'unit_price'))
+        self.assertEqual(items, [('Kettle', 2, Decimal('10.00')), ('Toaster', 1, Decimal('25.00'))])
+
+        # Deleting the product leaves the order line intact
+        self.kettle.delete()
+        self.assertEqual(OrderItem.objects.get(product_name='Kettle').product, None)
+
+    def test_order_queues_its_confirmation(self):
+        order = place_order(self.user, [self.line(self.kettle, 1)])
+        self.assertEqual(Task.objects.get().payload, {'order_id': order.id})
+
+
+class StockReservationTests(CheckoutTestCase):
+    def test_reservation_takes_only_available_units(self):
+        self.assertTrue(reserve_stock(self.toaster, 1))
+        self.assertFalse(reserve_stock(self.toaster, 1))
+        self.toaster.refresh_from_db()
+        self.assertEqual(self.toaster.stock, 0)
+
+    def test_untracked_stock_is_never_short(self):
+        untracked = Product.objects.create(name='Gift card', price=Decimal('5.00'))
+        self.assertTrue(reserve_stock(untracked, 1000))
+        untracked.refresh_from_db()
+        self.assertIsNone(untracked.stock)
+
+    def test_short_line_rolls_back_the_whole_order(self):
+        with self.assertRaises(OutOfStock) as raised:
+            place_order(self.user, [self.line(self.kettle, 2), self.line(self.toaster, 2)])
+        self.assertEqual(raised.exception.products, [self.toaster])
+        self.kettle.refresh_from_db()
+        self.assertEqual(self.kettle.stock, 5)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_checkout_view_reports_short_stock(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('cart_add', args=[self.toaster.id]), {'quantity': 2})
+        response = self.client.post(reverse('process_payment'))
+        self.assertRedirects(response, reverse('cart_detail'))
+        self.assertFalse(Order.objects.exists())
+
+
+class IdempotentPaymentTests(CheckoutTestCase):
+    def test_duplicate_key_rolls_back_its_reservations(self):
+        place_order(self.user, [self.line(self.kettle, 1)], idempotency_key='abc')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            place_order(self.user, [self.line(self.kettle, 1)], idempotency_key='abc')
+        self.kettle.refresh_from_db()
+        self.assertEqual(self.kettle.stock, 4)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_resubmitted_payment_replays_the_first_order(self):
+        self.client.force_login(self.user)
+        self.client.post(reverse('cart_add', args=[self.kettle.id]))
+        first = self.client.post(reverse('process_payment'), {'idempotency_key': 'abc'})
+        # The retry arrives after the first submit emptied the cart
+        second = self.client.post(reverse('process_payment'), {'idempotency_key': 'abc'})
+        order = Order.objects.get()
+        self.assertRedirects(first, reverse('order_confirmation', args=[order.id]))
+        self.assertRedirects(second, reverse('order_confirmation', args=[order.id]))
+        self.kettle.refresh_from_db()
+        self.assertEqual(self.kettle.stock, 4)
+
+    def test_same_key_from_another_user_is_a_new_order(self):
+        bob = User.objects.create_user('bob', 'bob@example.com', 'pw')
+        place_order(self.user, [self.line(self.kettle, 1)], idempotency_key='abc')
+        place_order(bob, [self.line(self.kettle, 1)], idempotency_key='abc')
+        self.assertEqual(Order.objects.count(), 2)
@@ -0,0 +1,21 @@
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import check_shared_cache
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_process_local_cache_is_an_error(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['core.E001'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'django_cache',
+    }})
+    def test_database_cache_is_a_warning(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['core.W001'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379/0',
+    }})
+    def test_redis_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
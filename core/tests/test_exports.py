@@ -0,0 +1,52 @@
+import csv
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase
+
+from core.management.export import ExportCommand
+from core.models import Category, Order, OrderItem, Product
+
+
+class ExportCommandTests(SimpleTestCase):
+    def test_get_lines_must_be_implemented(self):
+        class Incomplete(ExportCommand):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        phones = Category.objects.create(name='Phones')
+        self.phone = Product.objects.create(name='Pixel', price=Decimal('499.00'), stock=3, category=phones)
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        order = Order.objects.create(user=self.user, total_price=Decimal('998.00'))
+        OrderItem.objects.create(order=order, product=self.phone, product_name='Pixel', quantity=2, unit_price=Decimal('499.00'))
+
+    def test_products_ndjson(self):
+        out = StringIO()
+        call_command('export_products', stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(rows[0]['name'], 'Pixel')
+        self.assertEqual(rows[0]['category_name'], 'Phones')
+
+    def test_orders_csv_to_file(self):
+        path = os.path.join(tempfile.mkdtemp(), 'orders.csv')
+        self.addCleanup(os.remove, path)
+        call_command('export_orders', format='csv', output=path, stderr=StringIO())
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([(row['username'], row['product_name'], row['quantity']) for row in rows],
+                         [('alice', 'Pixel', '2')])
+
+    def test_unknown_user(self):
+        with self.assertRaises(CommandError):
+            call_command('export_orders', user='nobody', stdout=StringIO())
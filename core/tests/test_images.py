@@ -0,0 +1,68 @@
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.images import generate_variants, variant_names
+from core.models import Product, Task
+from core.templatetags.custom_filters import product_image
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image_file(size, mode='RGB', fmt='PNG'):
+    buffer = BytesIO()
+    Image.new(mode, size).save(buffer, fmt)
+    return ContentFile(buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, PRODUCT_IMAGE_WIDTHS=(120, 320, 640))
+class ImageVariantTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def product_with_image(self, size, mode='RGB'):
+        product = Product(name='Shoe', price=Decimal('1'))
+        product.image.save('shoe.png', image_file(size, mode), save=False)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        return product
+
+    def test_upload_queues_variants(self):
+        product = self.product_with_image((800, 600))
+        self.assertEqual(Task.objects.get(name='generate_product_images').payload, {'product_id': product.pk})
+
+    def test_widths_never_exceed_the_original(self):
+        product = self.product_with_image((400, 300))
+        self.assertEqual(generate_variants(product), [120, 320])
+        with Image.open(product.image.storage.open(variant_names(product.image_variants, 'jpg')[1])) as img:
+            self.assertEqual(img.size, (320, 240))
+
+    def test_transparency_keeps_png(self):
+        product = self.product_with_image((400, 300), mode='RGBA')
+        generate_variants(product)
+        self.assertEqual(product.image_variants['ext'], 'png')
+        self.assertTrue(all(name.endswith('.png') for name in variant_names(product.image_variants, 'png')))
+
+    def test_tag_falls_back_to_the_original_until_variants_exist(self):
+        product = self.product_with_image((800, 600))
+        self.assertTrue(product_image(product).startswith('<img src='))
+        generate_variants(product)
+        html = product_image(product, sizes='50vw')
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('sizes="50vw"', html)
+        self.assertIn('loading="lazy"', html)
+
+    def test_command_skips_products_that_are_done(self):
+        product = self.product_with_image((800, 600))
+        generate_variants(product)
+        out = StringIO()
+        call_command('generate_product_images', stdout=out, stderr=StringIO())
+        self.assertIn('for 0 products', out.getvalue())
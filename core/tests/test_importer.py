@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from core.importer import CatalogImporter, RowError, parse_row, read_rows
+from core.models import Category, Product
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImporterTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.log = []
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def write_image(self, name):
+        buffer = BytesIO()
+        Image.new('RGB', (8, 8), 'red').save(buffer, 'PNG')
+        with open(os.path.join(self.dir, name), 'wb') as f:
+            f.write(buffer.getvalue())
+
+    def run_import(self, path):
+        importer = CatalogImporter(base_dir=self.dir, log=self.log.append)
+        return importer.run(read_rows(path))
+
+    def test_malformed_json_line_is_counted_and_skipped(self):
+        path = self.write('rows.jsonl', '\n'.join([
+            json.dumps({'name': 'Kettle', 'price': '10'}),
+            '{"name": "Broken", ',
+            json.dumps({'name': 'Toaster', 'price': '20'}),
+        ]))
+        stats = self.run_import(path)
+        self.assertEqual((stats.created, stats.invalid), (2, 1))
+        self.assertTrue(any(line.startswith('row 2: invalid JSON') for line in self.log), self.log)
+
+    def test_non_object_json_line_is_invalid(self):
+        with self.assertRaises(RowError):
+            parse_row(['Kettle', '10'])
+
+    def test_new_category_gets_url_safe_unique_slug(self):
+        Category.objects.create(name='Home Kitchen', slug='home-kitchen')
+        path = self.write('rows.csv', 'name,price,category\nKettle,10,Home & Kitchen\n')
+        self.run_import(path)
+        category = Category.objects.get(name='Home & Kitchen')
+        self.assertEqual(category.slug, 'home-kitchen-2')
+
+    def test_missing_stock_column_keeps_existing_stock(self):
+        Product.objects.create(name='Kettle', price=Decimal('10'), stock=5)
+        path = self.write('rows.csv', 'name,price\nKettle,12\n')
+        stats = self.run_import(path)
+        self.assertEqual(stats.updated, 1)
+        product = Product.objects.get(name='Kettle')
+        self.assertEqual((product.price, product.stock), (Decimal('12'), 5))
+
+    def test_stock_column_is_written(self):
+        Product.objects.create(name='Kettle', price=Decimal('10'), stock=5)
+        self.run_import(self.write('rows.csv', 'name,price,stock\nKettle,10,0\n'))
+        self.assertEqual(Product.objects.get(name='Kettle').stock, 0)
+
+    def test_images_are_removed_when_the_batch_fails(self):
+        self.write_image('kettle.png')
+        path = self.write('rows.csv', 'name,price,image\nKettle,10,kettle.png\n')
+        with mock.patch('core.importer.enqueue_many', side_effect=RuntimeError('queue down')):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path)
+        self.assertFalse(Product.objects.filter(name='Kettle').exists())
+        self.assertEqual(default_storage.listdir('products')[1], [])
@@ -0,0 +1,123 @@
+import re
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+from PIL import Image
+
+from core.images import generate_variants, variant_names
+from core.media import serve_media
+from core.models import Product
+from core.templatetags.custom_filters import product_image
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def png_bytes(size=(800, 600), color='red'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+def is_immutable(name):
+    return re.search(settings.MEDIA_IMMUTABLE_PATTERN, name) is not None
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class HashedMediaTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def test_uploads_get_content_hashed_names(self):
+        first = default_storage.save('products/shoe.png', ContentFile(b'one'))
+        second = default_storage.save('products/shoe.png', ContentFile(b'two'))
+        again = default_storage.save('products/shoe.png', ContentFile(b'one'))
+        self.assertRegex(first, r'^products/shoe\.[0-9a-f]{12}\.png$')
+        self.assertNotEqual(first, second)
+        # Same content under a taken name: the random suffix keeps the hash last
+        self.assertRegex(again, r'^products/shoe_\w{7}\.[0-9a-f]{12}\.png$')
+        self.assertTrue(all(is_immutable(name) for name in (first, second, again)))
+
+    def test_hashed_names_are_cached_as_immutable(self):
+        name = default_storage.save('products/shoe.png', ContentFile(b'data'))
+        response = self.client.get(f'/media/{name}')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+    def test_plain_names_are_revalidated(self):
+        with open(f'{MEDIA_ROOT}/legacy_AbCdEfG.jpg', 'wb') as f:
+            f.write(b'data')
+        response = self.client.get('/media/legacy_AbCdEfG.jpg')
+        self.assertEqual(response['Cache-Control'], f'public, max-age={settings.MEDIA_CACHE_MAX_AGE}')
+
+    def test_variants_get_new_hashed_names(self):
+        product = Product.objects.create(name='Shoe', price=Decimal('1'))
+        product.image.save('shoe.png', ContentFile(png_bytes()), save=False)
+        Product.objects.filter(pk=product.pk).update(image=product.image.name)
+        generate_variants(product)
+        names = variant_names(product.image_variants, 'webp')
+        self.assertEqual(len(names), len(product.image_variants['widths']))
+        self.assertTrue(all(is_immutable(name) and default_storage.exists(name) for name in names))
+        self.assertIn(default_storage.url(names[0]), product_image(product))
+
+        # A redone variant never reuses a name with different bytes in it
+        with override_settings(PRODUCT_IMAGE_QUALITY=30):
+            generate_variants(product, force=True)
+        redone = variant_names(product.image_variants, 'webp')
+        self.assertTrue(all(default_storage.exists(name) for name in redone))
+        stale = set(names) - set(redone)
+        self.assertTrue(stale)
+        self.assertFalse(any(default_storage.exists(name) for name in stale))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ServeMediaTests(TestCase):
+    def setUp(self):
+        self.name = default_storage.save('docs/data.txt', ContentFile(b'0123456789'))
+        self.url = f'/media/{self.name}'
+
+    def test_full_response_has_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response['ETag'])
+
+    def test_conditional_get(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_byte_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-4/10')
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+        suffix = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(suffix.streaming_content), b'789')
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_stale_if_range_sends_the_whole_file(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-4', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_path_traversal_is_refused(self):
+        with self.assertRaises(Http404):
+            serve_media(RequestFactory().get('/'), '../manage.py')
+
+    @override_settings(MEDIA_OFFLOAD='x-accel-redirect', MEDIA_OFFLOAD_PREFIX='/protected-media/')
+    def test_offload_leaves_the_body_to_the_server(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.name}')
+        self.assertEqual(response.content, b'')
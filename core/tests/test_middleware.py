@@ -0,0 +1,55 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.middleware import get_cached_user
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.client.force_login(self.user)
+
+    def request(self):
+        request = RequestFactory().get('/')
+        request.session = self.client.session
+        return request
+
+    def user_queries(self, request):
+        with CaptureQueriesContext(connection) as queries:
+            user = get_cached_user(request)
+        return user, [q for q in queries.captured_queries if 'auth_user' in q['sql']]
+
+    def test_second_load_skips_auth_user(self):
+        self.user_queries(self.request())
+        user, queries = self.user_queries(self.request())
+        self.assertEqual(user, self.user)
+        self.assertEqual(queries, [])
+
+    def test_session_from_before_a_password_change_gets_no_cached_user(self):
+        old_session = self.request()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('new-pw')
+            self.user.save()
+        # A fresh login caches the user under the new password's fingerprint
+        self.client.force_login(self.user)
+        self.user_queries(self.request())
+        user, _ = self.user_queries(old_session)
+        self.assertFalse(user.is_authenticated)
+
+    def test_user_save_invalidates(self):
+        self.user_queries(self.request())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Alice'
+            self.user.save()
+        user, queries = self.user_queries(self.request())
+        self.assertEqual(user.first_name, 'Alice')
+        self.assertTrue(queries)
+
+    def test_anonymous_session(self):
+        request = RequestFactory().get('/')
+        request.session = self.client_class().session
+        self.assertFalse(get_cached_user(request).is_authenticated)
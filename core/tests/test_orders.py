@@ -0,0 +1,42 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.models import Order
+from core.orders import get_order_summary
+
+
+class OrderSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.first = Order.objects.create(user=self.user, total_price=Decimal('10.00'))
+
+    def test_summary_is_cached(self):
+        get_order_summary(self.user)
+        with self.assertNumQueries(0):
+            summary = get_order_summary(self.user)
+        self.assertEqual((summary['count'], summary['lifetime_spend']), (1, Decimal('10.00')))
+
+    def test_new_order_invalidates_the_summary(self):
+        get_order_summary(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(user=self.user, total_price=Decimal('5.00'))
+        summary = get_order_summary(self.user)
+        self.assertEqual((summary['count'], summary['lifetime_spend']), (2, Decimal('15.00')))
+
+    def test_editing_an_order_invalidates_the_summary(self):
+        Order.objects.create(user=self.user, total_price=Decimal('5.00'))
+        get_order_summary(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.total_price = Decimal('20.00')
+            self.first.save()
+        self.assertEqual(get_order_summary(self.user)['lifetime_spend'], Decimal('25.00'))
+
+    def test_deleting_an_order_invalidates_the_summary(self):
+        get_order_summary(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.delete()
+        self.assertEqual(get_order_summary(self.user)['count'], 0)
@@ -0,0 +1,100 @@
+import re
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.catalog import bump_category_version
+from core.middleware import CSRF_PLACEHOLDER
+from core.models import Category, Product
+
+CSRF_TOKEN_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Kitchen', slug='kitchen')
+        self.product = Product.objects.create(name='Kettle', price=Decimal('10.00'), category=self.category)
+
+    def test_second_anonymous_visit_is_served_without_queries(self):
+        first = self.client.get(reverse('index'))
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        # The test cache is LocMemCache; with db:// the hit's cache read is a query
+        with self.assertNumQueries(0):
+            second = Client().get(reverse('index'))
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertContains(second, 'Kettle')
+
+    def test_a_hit_is_one_cache_round_trip(self):
+        self.client.get(reverse('index'))
+        with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many, \
+                mock.patch.object(cache, 'get', wraps=cache.get) as get:
+            response = Client().get(reverse('index'))
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(get_many.call_count, 1)
+        # LocMemCache.get_many() reads its keys one by one; nothing else reads
+        self.assertEqual(get.call_count, len(get_many.call_args.args[0]))
+
+    def test_page_is_stored_under_the_version_read_before_rendering(self):
+        with mock.patch('core.views.get_nav_categories', side_effect=lambda: bump_category_version() or []):
+            self.client.get(reverse('index'))
+        # The catalog changed while the page rendered, so it was already stale
+        self.assertEqual(Client().get(reverse('index'))['X-Page-Cache'], 'miss')
+
+    def test_logged_in_users_bypass_the_cache(self):
+        self.client.get(reverse('index'))
+        user = User.objects.create_user('alice', 'alice@example.com', 'pw-12345')
+        self.client.force_login(user)
+        response = self.client.get(reverse('index'))
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_visitors_with_a_cart_bypass_the_cache(self):
+        self.client.get(reverse('index'))
+        self.client.post(reverse('cart_add', args=[self.product.id]))
+        response = self.client.get(reverse('index'))
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_non_get_requests_are_not_cached(self):
+        response = self.client.head(reverse('index'))
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_product_save_retires_cached_pages(self):
+        self.client.get(reverse('index'))
+        self.product.name = 'Steel kettle'
+        self.product.save()
+        response = Client().get(reverse('index'))
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Steel kettle')
+
+    def test_category_save_retires_cached_pages(self):
+        url = reverse('category_detail', args=[self.category.slug])
+        self.client.get(url)
+        self.category.name = 'Cookware'
+        self.category.save()
+        self.assertEqual(Client().get(url)['X-Page-Cache'], 'miss')
+
+    def test_tracking_parameters_share_the_cached_page(self):
+        self.client.get(reverse('index'))
+        response = Client().get(reverse('index'), {'utm_source': 'mail', 'fbclid': 'abc'})
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+
+    def test_other_parameters_get_their_own_page(self):
+        self.client.get(reverse('index'))
+        response = Client().get(reverse('index'), {'page': '2'})
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+
+    def test_cached_page_carries_a_working_csrf_token(self):
+        self.client.get(reverse('product_detail', args=[self.product.id]))
+        visitor = Client(enforce_csrf_checks=True)
+        response = visitor.get(reverse('product_detail', args=[self.product.id]))
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertNotIn(CSRF_PLACEHOLDER, response.content)
+        token = CSRF_TOKEN_RE.search(response.content.decode()).group(1)
+
+        response = visitor.post(reverse('cart_add', args=[self.product.id]), {'csrfmiddlewaretoken': token})
+        self.assertNotEqual(response.status_code, 403)
@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Product
+from core.pagination import InvalidCursor, _pack, paginate_newest_first, paginate_ranked
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        Product.objects.bulk_create([Product(name=f'Product {n}', price=Decimal('1')) for n in range(7)])
+        # Identical timestamps: the id tie-breaker must keep pages disjoint
+        Product.objects.update(created_at=timezone.now())
+        self.newest_first = list(Product.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def walk(self, page_size):
+        ids, cursor = [], None
+        while True:
+            page = paginate_newest_first(Product.objects.all(), after=cursor, page_size=page_size)
+            ids.extend(product.id for product in page)
+            if not page.has_next:
+                return ids
+            cursor = page.next_cursor
+
+    def test_forward_walk_visits_every_row_once(self):
+        self.assertEqual(self.walk(3), self.newest_first)
+
+    def test_before_returns_the_previous_page(self):
+        first = paginate_newest_first(Product.objects.all(), page_size=3)
+        second = paginate_newest_first(Product.objects.all(), after=first.next_cursor, page_size=3)
+        back = paginate_newest_first(Product.objects.all(), before=second.previous_cursor, page_size=3)
+        self.assertEqual([p.id for p in back], [p.id for p in first])
+        self.assertFalse(back.has_previous)
+
+    def test_bad_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            paginate_newest_first(Product.objects.all(), after='not-a-cursor')
+
+    def test_view_restarts_on_bad_cursor(self):
+        response = self.client.get(reverse('index'), {'after': 'garbage'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['page'].has_previous)
+
+    def test_ranked_pages_follow_rank_order(self):
+        ranked = list(reversed(self.newest_first))
+        calls = []
+
+        def search(limit, offset):
+            calls.append((limit, offset))
+            return ranked[offset:offset + limit]
+
+        first = paginate_ranked(Product.objects.all(), search, page_size=4)
+        second = paginate_ranked(Product.objects.all(), search, after=first.next_cursor, page_size=4)
+        self.assertEqual([p.id for p in first] + [p.id for p in second], ranked)
+        self.assertFalse(second.has_next)
+        # Each page asks only for its own slice (plus one row to detect a next page)
+        self.assertEqual(calls, [(5, 0), (5, 4)])
+
+        back = paginate_ranked(Product.objects.all(), search, before=second.previous_cursor, page_size=4)
+        self.assertEqual([p.id for p in back], [p.id for p in first])
+        self.assertFalse(back.has_previous)
+        self.assertEqual(back.next_cursor, first.next_cursor)
+
+    def test_bad_ranked_cursor(self):
+        search = lambda limit, offset: []
+        for cursor in ('garbage', _pack([-1]), _pack(['x'])):
+            with self.assertRaises(InvalidCursor):
+                paginate_ranked(Product.objects.all(), search, after=cursor)
+
+    def test_feed_returns_next_cursor(self):
+        response = self.client.get(reverse('product_feed'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('next_cursor', response.json())
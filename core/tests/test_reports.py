@@ -0,0 +1,61 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Category, DailyCategorySales, DailyProductSales, DailySales, Order, OrderItem, Product
+from core.reports import rollup_sales
+
+
+@override_settings(SALES_ROLLUP_LAG=60)
+class SalesRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.phones = Category.objects.create(name='Phones')
+        self.phone = Product.objects.create(name='Pixel', price=Decimal('100.00'), category=self.phones)
+        self.kettle = Product.objects.create(name='Kettle', price=Decimal('20.00'))
+
+    def order(self, lines, hours_ago=2):
+        order = Order.objects.create(
+            user=self.user, total_price=sum(product.price * quantity for product, quantity in lines),
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(hours=hours_ago))
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, product_name=product.name, quantity=quantity, unit_price=product.price)
+            for product, quantity in lines
+        ])
+        return order
+
+    def test_totals_match_the_orders(self):
+        self.order([(self.phone, 1), (self.kettle, 2)])
+        self.order([(self.phone, 2)], hours_ago=30)
+        self.assertEqual(rollup_sales(batch_size=1), 2)
+        self.assertEqual(DailySales.objects.aggregate(total=Sum('revenue'))['total'], Decimal('340.00'))
+        self.assertEqual(DailySales.objects.aggregate(units=Sum('units'))['units'], 5)
+        phone_revenue = DailyCategorySales.objects.filter(category=self.phones).aggregate(total=Sum('revenue'))
+        self.assertEqual(phone_revenue['total'], Decimal('300.00'))
+        self.assertEqual(DailyCategorySales.objects.get(category=None).revenue, Decimal('40.00'))
+
+    def test_runs_are_incremental(self):
+        self.order([(self.kettle, 1)])
+        rollup_sales()
+        self.order([(self.kettle, 1)])
+        self.assertEqual(rollup_sales(), 1)
+        self.assertEqual(rollup_sales(), 0)
+        self.assertEqual(DailyProductSales.objects.get(product=self.kettle).units, 2)
+
+    def test_recent_orders_wait_for_the_next_run(self):
+        self.order([(self.kettle, 1)], hours_ago=0)
+        self.assertEqual(rollup_sales(), 0)
+        self.assertFalse(DailySales.objects.exists())
+
+    def test_rebuild_recounts(self):
+        self.order([(self.kettle, 1)])
+        rollup_sales()
+        call_command('rollup_sales', rebuild=True, stdout=StringIO())
+        self.assertEqual(DailySales.objects.get().orders, 1)
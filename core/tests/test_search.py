@@ -0,0 +1,86 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Category, Product
+from core.search import LikeSearchBackend, search_product_ids, tokenize
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.phone = Product.objects.create(name='iPhone 17 Pro', price=Decimal('1'), description='A phone')
+        self.case = Product.objects.create(name='Leather case', price=Decimal('1'), description='Fits the iPhone 17')
+        Product.objects.create(name='Kettle', price=Decimal('1'))
+
+    def test_search_syntax_is_stripped(self):
+        self.assertEqual(tokenize('iPhone* "pro" OR -x'), ['iphone', 'pro', 'or', 'x'])
+        self.assertEqual(search_product_ids('"*', 10), [])
+
+    def test_prefix_match_ranks_name_hits_first(self):
+        self.assertEqual(search_product_ids('iph', 10), [self.phone.id, self.case.id])
+
+    def test_all_tokens_must_match(self):
+        self.assertEqual(search_product_ids('iphone pro', 10), [self.phone.id])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.case.name = 'Leather wallet'
+        self.case.description = ''
+        self.case.save()
+        self.assertEqual(search_product_ids('iphone', 10), [self.phone.id])
+        self.phone.delete()
+        self.assertEqual(search_product_ids('iphone', 10), [])
+
+    def test_rebuild_reindexes_bulk_writes(self):
+        Product.objects.bulk_create([Product(name='Toaster', price=Decimal('1'))])
+        self.assertEqual(search_product_ids('toaster', 10), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(search_product_ids('toaster', 10)), 1)
+
+    def test_offset_continues_the_ranking(self):
+        self.assertEqual(search_product_ids('iph', 1), [self.phone.id])
+        self.assertEqual(search_product_ids('iph', 1, offset=1), [self.case.id])
+
+    def test_category_is_filtered_inside_the_search(self):
+        cases = Category.objects.create(name='Cases', slug='cases')
+        self.case.category = cases
+        self.case.save()
+        self.assertEqual(search_product_ids('iphone', 10, category='cases'), [self.case.id])
+        self.assertEqual(LikeSearchBackend().search('iphone', 10, category='cases'), [self.case.id])
+
+    @override_settings(PRODUCTS_PAGE_SIZE=2)
+    def test_feed_search_within_a_category_fills_its_pages(self):
+        kitchen = Category.objects.create(name='Kitchen', slug='kitchen')
+        for n in range(3):
+            Product.objects.create(name=f'Iphone mug {n}', price=Decimal('1'), category=kitchen)
+        data = self.client.get(reverse('product_feed'), {'q': 'iphone', 'category': 'kitchen'}).json()
+        self.assertEqual(data['html'].count('Iphone mug'), 2)
+        self.assertTrue(data['has_next'])
+        data = self.client.get(
+            reverse('product_feed'), {'q': 'iphone', 'category': 'kitchen', 'after': data['next_cursor']},
+        ).json()
+        self.assertIn('Iphone mug', data['html'])
+        self.assertFalse(data['has_next'])
+
+    def test_like_backend(self):
+        self.assertEqual(LikeSearchBackend().search('iphone 17', 10), [self.case.id, self.phone.id])
+        self.assertEqual(LikeSearchBackend().search('iphone 17', 10, offset=1), [self.phone.id])
+
+    def test_search_view(self):
+        response = self.client.get(reverse('search_results'), {'q': 'kettle'})
+        self.assertEqual([p.name for p in response.context['products']], ['Kettle'])
+
+    @override_settings(PRODUCTS_PAGE_SIZE=2)
+    def test_search_view_pages_reach_every_hit(self):
+        Product.objects.bulk_create([Product(name=f'Kettle {n}', price=Decimal('1')) for n in range(4)])
+        call_command('rebuild_search_index', stdout=StringIO())
+        names, params = [], {'q': 'kettle'}
+        while True:
+            page = self.client.get(reverse('search_results'), params).context['page']
+            names.extend(p.name for p in page)
+            if not page.has_next:
+                break
+            params['after'] = page.next_cursor
+        self.assertEqual(sorted(names), ['Kettle', 'Kettle 0', 'Kettle 1', 'Kettle 2', 'Kettle 3'])
@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+
+from core.models import Category, Product
+from core.suggest import suggestion_index
+
+
+class SuggestionIndexTests(TestCase):
+    def setUp(self):
+        suggestion_index.clear()
+        self.addCleanup(suggestion_index.clear)
+
+    def labels(self, prefix):
+        return [result['label'] for result in suggestion_index.lookup(prefix, 10)]
+
+    def test_category_with_unsafe_slug_can_be_saved(self):
+        suggestion_index.lookup('x', 10)  # loaded
+        Category.objects.create(name='Home & Kitchen')
+        Category.objects.create(name='Home Audio')
+        # The unsafe slug has no page, so only the other category is suggested
+        self.assertEqual(self.labels('home'), ['Home Audio'])
+
+    def test_signals_patch_a_loaded_index(self):
+        Product.objects.create(name='Pro Football', price=Decimal('1'))
+        self.assertEqual(self.labels('pro'), ['Pro Football'])
+        product = Product.objects.create(name='iPhone 17 Pro Max', price=Decimal('1'))
+        with self.assertNumQueries(0):
+            results = suggestion_index.lookup('pro', 10)
+        self.assertEqual(len(results), 2)
+        product.delete()
+        self.assertEqual(self.labels('pro'), ['Pro Football'])
+
+    def test_stale_index_is_rebuilt(self):
+        self.assertEqual(self.labels('ket'), [])
+        # bulk_create skips the signals, like a write from another process
+        Product.objects.bulk_create([Product(name='Kettle', price=Decimal('1'))])
+        self.assertEqual(self.labels('ket'), [])
+        with override_settings(SEARCH_SUGGEST_REFRESH=-1):
+            self.assertEqual(self.labels('ket'), ['Kettle'])
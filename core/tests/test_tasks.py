@@ -0,0 +1,60 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Task
+from core.tasks import TASK_HANDLERS, claim_tasks, enqueue, purge_done_tasks, requeue_stale_tasks, run_task
+
+
+@override_settings(TASK_LOCK_TIMEOUT=60, TASK_DONE_RETENTION=3600)
+class TaskQueueTests(TestCase):
+    def lock(self, task, minutes_ago, attempts=0):
+        Task.objects.filter(pk=task.pk).update(
+            status=Task.RUNNING, locked_by='dead-worker', attempts=attempts,
+            locked_at=timezone.now() - timedelta(minutes=minutes_ago),
+        )
+
+    def test_run_task_retries_then_fails(self):
+        task = enqueue('boom')
+        with mock.patch.dict(TASK_HANDLERS, {'boom': mock.Mock(side_effect=RuntimeError)}):
+            self.assertFalse(run_task(task))
+            task.refresh_from_db()
+            self.assertEqual((task.status, task.attempts), (Task.PENDING, 1))
+            task.attempts = task.max_attempts - 1
+            self.assertFalse(run_task(task))
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+
+    def test_stale_task_is_requeued_with_an_attempt_counted(self):
+        task = enqueue('noop')
+        self.lock(task, minutes_ago=5)
+        self.assertEqual(requeue_stale_tasks(), 1)
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts, task.locked_by), (Task.PENDING, 1, ''))
+        self.assertEqual(len(claim_tasks('worker', 10)), 1)
+
+    def test_stale_task_fails_at_max_attempts(self):
+        task = enqueue('noop')
+        self.lock(task, minutes_ago=5, attempts=task.max_attempts - 1)
+        self.assertEqual(requeue_stale_tasks(), 0)
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), (Task.FAILED, task.max_attempts))
+        self.assertTrue(task.last_error)
+
+    def test_running_task_within_timeout_is_left_alone(self):
+        task = enqueue('noop')
+        self.lock(task, minutes_ago=0)
+        self.assertEqual(requeue_stale_tasks(), 0)
+
+    def test_purge_deletes_only_old_done_tasks(self):
+        old = timezone.now() - timedelta(hours=2)
+        done_old = enqueue('noop')
+        failed_old = enqueue('noop')
+        done_new = enqueue('noop')
+        Task.objects.filter(pk=done_old.pk).update(status=Task.DONE, run_at=old)
+        Task.objects.filter(pk=failed_old.pk).update(status=Task.FAILED, run_at=old)
+        Task.objects.filter(pk=done_new.pk).update(status=Task.DONE)
+        self.assertEqual(purge_done_tasks(batch_size=1), 1)
+        self.assertEqual(set(Task.objects.values_list('pk', flat=True)), {failed_old.pk, done_new.pk})
@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Product, Wishlist
+
+
+class WishlistTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pw')
+        self.client.force_login(self.user)
+
+    def create_products(self, count):
+        return Product.objects.bulk_create([Product(name=f'Item {n}', price=Decimal('1')) for n in range(count)])
+
+    def wishlist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('index'))
+        return response, [q['sql'] for q in queries.captured_queries if 'core_wishlist' in q['sql']]
+
+    def test_grid_checks_membership_with_one_query(self):
+        products = self.create_products(12)
+        Wishlist.objects.create(user=self.user, product=products[3])
+        response, queries = self.wishlist_queries()
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, 'aria-pressed="true"', count=1)
+
+    def test_anonymous_grid_skips_the_query(self):
+        self.create_products(3)
+        self.client.logout()
+        _, queries = self.wishlist_queries()
+        self.assertEqual(queries, [])
+
+    def test_toggle_answers_json(self):
+        product = self.create_products(1)[0]
+        url = reverse('toggle_wishlist', args=[product.id])
+        self.assertEqual(self.client.post(url, HTTP_ACCEPT='application/json').json()['saved'], True)
+        self.assertEqual(self.client.post(url, HTTP_ACCEPT='application/json').json()['saved'], False)
+        self.assertFalse(Wishlist.objects.exists())
+
+    def test_toggle_ignores_offsite_next(self):
+        product = self.create_products(1)[0]
+        response = self.client.post(reverse('toggle_wishlist', args=[product.id]), {'next': 'https://evil.example/'})
+        self.assertRedirects(response, reverse('wishlist'), fetch_redirect_response=False)
@@ -1,9 +1,8 @@
 from django.urls import path
 from . import views
-from django.conf import settings
 from django.conf.urls.static import static
-from django.views.static import serve
 from django.urls import re_path
+from .media import serve_media
 
 urlpatterns = [
     # General & Product Views
@@ -11,6 +10,8 @@ urlpatterns = [
     path('product/<int:product_id>/', views.product_detail, name='product_detail'),
     path('category/<slug:slug>/', views.category_detail, name='category_detail'),
     path('search/', views.search_results, name='search_results'), 
+    path('search/suggest/', views.search_suggest, name='search_suggest'),
+    path('products/feed/', views.product_feed, name='product_feed'),
 
     # Auth Views
     path('login/', views.login_view, name='login'),
@@ -21,8 +22,9 @@ urlpatterns = [
     path('dashboard/', views.user_dashboard, name='user_dashboard'),
     path('dashboard/settings/', views.account_settings_view, name='account_settings'),
     path('dashboard/orders/', views.track_orders_view, name='track_orders'),
+    path('dashboard/orders/export.<str:file_format>', views.export_my_orders_view, name='export_my_orders'),
     path('dashboard/wishlist/', views.wishlist_view, name='wishlist'),
-    path('dashboard/wishlist/add/<int:product_id>/', views.add_to_wishlist, name='add_to_wishlist'),
+    path('dashboard/wishlist/toggle/<int:product_id>/', views.toggle_wishlist, name='toggle_wishlist'),
     
     # Address Views
     path('addresses/', views.my_addresses_view, name='my_addresses'),
@@ -32,9 +34,14 @@ urlpatterns = [
     # path('addresses/delete/<int:address_id>/', views.delete_address_view, name='delete_address'),
     # path('addresses/default/<int:address_id>/', views.set_default_address_view, name='set_default_address'),
 
+    # Exports (staff only)
+    path('exports/products.<str:file_format>', views.export_products_view, name='export_products'),
+    path('exports/orders.<str:file_format>', views.export_all_orders_view, name='export_all_orders'),
+
     # Cart & Checkout Views
     path('cart/', views.cart_detail, name='cart_detail'),
     path('cart/add/<int:product_id>/', views.cart_add, name='cart_add'),
+    path('cart/update/<int:product_id>/', views.cart_update, name='cart_update'),
     path('cart/remove/<int:product_id>/', views.cart_remove, name='cart_remove'),
     path('checkout/', views.checkout_view, name='checkout'),
     path('payment-process/', views.process_payment, name='process_payment'),
@@ -50,7 +57,5 @@ urlpatterns = [
 ]
 
 urlpatterns += [
-    re_path(r'^media/(?P<path>.*)$', serve, {
-        'document_root': settings.MEDIA_ROOT,
-    }),
+    re_path(r'^media/(?P<path>.*)$', serve_media, name='media'),
 ]
\ No newline at end of file
@@ -3,22 +3,67 @@ from django.contrib.auth.models import User
 from django.contrib import messages 
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout 
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.http import require_POST
-from django.db.models import Q 
+from django.db import IntegrityError, transaction
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.conf import settings
+from functools import partial
+from urllib.parse import urlencode
+import uuid
 # Forms and Models
 from .forms import AddressForm, AddCardForm, AddUPIForm, AccountSettingsForm # <-- ADDED AccountSettingsForm
 from .models import Order, Product, Category, Wishlist, Address, SavedCard, SavedUPI 
-from .cart import Cart
+from .cart import Cart, get_request_cart
+from .catalog import get_nav_categories
+from .exports import FORMATS, export_orders, export_products
+from .checkout import place_order, OutOfStock
+from .orders import get_order_summary
+from .pagination import paginate_newest_first, paginate_ranked, InvalidCursor
+from .search import search_product_ids
+from .suggest import suggestion_index
 
 # --- SHARED CONTEXT FUNCTION ---
 def get_shared_context(request):
-    """Initializes the cart and fetches all categories."""
-    cart = Cart(request) 
-    categories = Category.objects.all()
+    """Initializes the cart and fetches all categories (from the nav cache)."""
+    cart = get_request_cart(request) 
+    categories = get_nav_categories()
     return {'cart': cart, 'categories': categories}
 
 # --- PRODUCT AND SHOP VIEWS ---
 
+def get_product_page(request, products, search=None):
+    """
+    Returns the page of `products` selected by ?after= / ?before=. Search results
+    pass `search` (see paginate_ranked) so pages follow relevance instead of recency.
+    """
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    try:
+        if search is not None:
+            return paginate_ranked(products, search, after=after, before=before)
+        return paginate_newest_first(products, after=after, before=before)
+    except InvalidCursor:
+        # A mangled or stale cursor just restarts the listing
+        if search is not None:
+            return paginate_ranked(products, search)
+        return paginate_newest_first(products)
+
+def get_grid_context(request, products, search=None, **filters):
+    """Builds the product grid context shared by index.html and the JSON feed."""
+    page = get_product_page(request, products, search)
+    filters = {key: value for key, value in filters.items() if value}
+    query_prefix = urlencode(filters) + '&' if filters else ''
+    return {
+        'products': page,
+        'page': page,
+        'page_query': query_prefix,
+        'feed_url': reverse('product_feed') + '?' + query_prefix,
+    }
+
 def search_results(request):
     """
     Handles product search functionality based on query parameters.
@@ -26,23 +71,22 @@ def search_results(request):
     """
     context = get_shared_context(request)
     query = request.GET.get('q') 
-    products = Product.objects.all()
-    
-    if query:
-        search_query = (
-            Q(name__icontains=query) | 
-            Q(description__icontains=query)
-        )
-        products = products.filter(search_query).distinct()
+    search = partial(search_product_ids, query) if query else None
 
+    context.update(get_grid_context(request, Product.objects.all(), search, q=query))
     context.update({
-        'products': products,
         'query': query, 
         'hide_hero': True, 
     })
     
     return render(request, 'index.html', context)
 
+def search_suggest(request):
+    """Search-as-you-type: product and category names matching the typed prefix."""
+    query = request.GET.get('q', '')
+    results = suggestion_index.lookup(query, settings.SEARCH_SUGGEST_LIMIT)
+    return JsonResponse({'query': query, 'results': results})
+
 
 def product_detail(request, product_id):
     """Renders the single product detail page."""
@@ -58,11 +102,7 @@ def product_detail(request, product_id):
 
 def index(request):
     context = get_shared_context(request)
-    products = Product.objects.all() 
-    
-    context.update({
-        'products': products,
-    })
+    context.update(get_grid_context(request, Product.objects.all()))
     
     return render(request, 'index.html', context)
 
@@ -72,42 +112,76 @@ def category_detail(request, slug):
     products = Product.objects.filter(category=category)
     context = get_shared_context(request)
     
+    context.update(get_grid_context(request, products, category=category.slug))
     context.update({
-        'products': products,
         'active_category': category.name,
         'hide_hero': True 
     })
     
     return render(request, 'index.html', context)
 
+def product_feed(request):
+    """
+    Infinite-scroll endpoint: returns the next page of product cards as an HTML
+    fragment plus the cursor for the page after it.
+    """
+    products = Product.objects.all()
+    slug = request.GET.get('category')
+    query = request.GET.get('q')
+    # The category is filtered inside the search too, or its pages would be
+    # cut from hits across the whole catalog and come back short
+    search = partial(search_product_ids, query, category=slug) if query else None
+
+    if slug:
+        products = products.filter(category__slug=slug)
+
+    context = get_grid_context(request, products, search, q=query, category=slug)
+    page = context['page']
+
+    return JsonResponse({
+        'html': render_to_string('product_cards.html', context, request=request),
+        'next_cursor': page.next_cursor,
+        'has_next': page.has_next,
+    })
+
 # --- AUTHENTICATION VIEWS ---
 
 def login_view(request):
     if request.method == 'POST':
         user_input = request.POST['username'] 
         password = request.POST['password']
-        username_to_auth = user_input 
-
-        if '@' in user_input:
-            try:
-                user_obj = User.objects.get(email=user_input)
-                username_to_auth = user_obj.username 
-            except User.DoesNotExist:
-                messages.error(request, "No account found with this email.")
-                return redirect('login')
 
-        user = authenticate(request, username=username_to_auth, password=password)
+        # EmailOrUsernameBackend accepts either form of login
+        user = authenticate(request, username=user_input, password=password)
 
         if user is not None:
+            # Carry whatever was added while logged out into the user's cart
+            anonymous_cart = Cart(request)
             auth_login(request, user)
+            Cart(request).merge(anonymous_cart)
             messages.success(request, f"Welcome back!")
             return redirect('user_dashboard')
         else:
-            messages.error(request, "Incorrect password.")
+            messages.error(request, "Incorrect username/email or password.")
             return redirect('login')
 
     return render(request, 'login.html')
 
+DUPLICATE_USER_MESSAGES = {
+    'email': "That email is already in use.",
+    'username': "That username is already taken.",
+}
+
+def duplicate_user_field(exc):
+    """'email' or 'username' when `exc` came from that auth_user unique index, else None."""
+    message = str(exc)
+    if 'auth_user_email_lower_uniq' in message:
+        return 'email'
+    # Postgres names the constraint; SQLite and MySQL name the column
+    if 'auth_user_username_key' in message or 'auth_user.username' in message:
+        return 'username'
+    return None
+
 def register_view(request):
     if request.method == 'POST':
         username = request.POST['username']
@@ -119,17 +193,18 @@ def register_view(request):
             messages.error(request, "Passwords do not match!")
             return redirect('user_register') 
         
-        if User.objects.filter(username=username).exists():
-            messages.error(request, "That username is already taken.")
-            return redirect('user_register') 
-
-        if User.objects.filter(email=email).exists():
-            messages.error(request, "That email is already in use.")
+        # The unique username and email indexes do the duplicate checks, so
+        # two people racing for the same name can't both get it
+        try:
+            with transaction.atomic():
+                User.objects.create_user(username=username, email=email, password=password)
+        except IntegrityError as exc:
+            field = duplicate_user_field(exc)
+            if field is None:
+                raise
+            messages.error(request, DUPLICATE_USER_MESSAGES[field])
             return redirect('user_register') 
 
-        user = User.objects.create_user(username=username, email=email, password=password)
-        user.save()
-
         messages.success(request, "Account created successfully! Please log in.")
         return redirect('login')
 
@@ -138,41 +213,74 @@ def register_view(request):
 @login_required(login_url='/login/') 
 def user_dashboard(request):
     user = request.user
-    try:
-        recent_orders = Order.objects.filter(user=user).order_by('-created_at')[:5]
-    except:
-        recent_orders = [] 
-    
     context = {
         'user': user,
-        'orders': recent_orders,
+        'order_summary': get_order_summary(user),
         'loyalty_points': 120,
-        'cart': Cart(request),
+        'cart': get_request_cart(request),
     }
     return render(request, 'dashboard.html', context)
 
 # --- CART VIEWS ---
 
+def wants_json(request):
+    """True when the client (cart.js) asked for a JSON reply instead of a page."""
+    return 'application/json' in request.headers.get('Accept', '')
+
+def cart_response(request, cart, product):
+    """
+    JSON callers get the updated line, line count and total so they can patch
+    the page in place; plain form posts fall back to the cart page.
+    """
+    if not wants_json(request):
+        return redirect('cart_detail')
+
+    return JsonResponse({
+        'line': cart.get_line(product),
+        'count': len(cart.cart),
+        'quantity': len(cart),
+        'total': str(cart.get_total_price()),
+    })
+
 @require_POST
 def cart_add(request, product_id):
-    cart = Cart(request)
+    cart = get_request_cart(request)
+    product = get_object_or_404(Product, id=product_id)
+    try:
+        quantity = max(int(request.POST.get('quantity', 1)), 1)
+    except ValueError:
+        quantity = 1
+    cart.add(product=product, quantity=quantity)
+    return cart_response(request, cart, product)
+
+@require_POST
+def cart_update(request, product_id):
+    """Sets the quantity of one cart line (0 removes it)."""
+    cart = get_request_cart(request)
     product = get_object_or_404(Product, id=product_id)
-    cart.add(product=product)
-    return redirect('cart_detail')
+    try:
+        quantity = int(request.POST['quantity'])
+    except (KeyError, ValueError):
+        if wants_json(request):
+            return JsonResponse({'error': 'A whole-number quantity is required.'}, status=400)
+        messages.error(request, "Please enter a valid quantity.")
+        return redirect('cart_detail')
+    cart.set_quantity(product, quantity)
+    return cart_response(request, cart, product)
 
 def cart_remove(request, product_id):
-    cart = Cart(request)
+    cart = get_request_cart(request)
     product = get_object_or_404(Product, id=product_id)
     cart.remove(product)
-    return redirect('cart_detail')
+    return cart_response(request, cart, product)
 
 def cart_detail(request):
-    cart = Cart(request)
+    cart = get_request_cart(request)
     return render(request, 'cart_detail.html', {'cart': cart})
 
 @login_required(login_url='/login/')
 def checkout_view(request):
-    cart = Cart(request)
+    cart = get_request_cart(request)
     
     if not cart:
         messages.error(request, "Your cart is empty and cannot be checked out.")
@@ -186,31 +294,45 @@ def checkout_view(request):
 @login_required(login_url='/login/')
 def process_payment(request):
     """Handles payment method selection and final order creation."""
-    cart = Cart(request)
+    idempotency_key = request.POST.get('idempotency_key') or None
+
+    # A double-click or retried POST carries the same key as the order it
+    # already created: replay that result instead of placing a second order.
+    # This runs before the empty-cart check because the first submit cleared it.
+    if request.method == 'POST' and idempotency_key:
+        existing_order = Order.objects.filter(user=request.user, idempotency_key=idempotency_key).first()
+        if existing_order:
+            return redirect('order_confirmation', order_id=existing_order.id)
+
+    cart = get_request_cart(request)
 
     if not cart:
         messages.error(request, "Your cart is empty and cannot be processed.")
         return redirect('cart_detail')
 
     if request.method == 'POST':
-        user = request.user
-        total_price = cart.get_total_price()
-        
-        product_summary = [f"{item['quantity']}x {item['product'].name}" for item in cart]
-        product_names = "\n".join(product_summary)
-
-        order = Order.objects.create( 
-            user=user,
-            product_names=product_names,
-            total_price=total_price
-        )
+        try:
+            order = place_order(request.user, list(cart), idempotency_key=idempotency_key)
+        except OutOfStock as e:
+            names = ', '.join(product.name for product in e.products)
+            messages.error(request, f"Sorry, there isn't enough stock left for: {names}. Please update your cart.")
+            return redirect('cart_detail')
+        except IntegrityError:
+            if idempotency_key is None:
+                raise
+            # A concurrent retry with the same key committed first
+            order = get_object_or_404(Order, user=request.user, idempotency_key=idempotency_key)
+            return redirect('order_confirmation', order_id=order.id)
 
         cart.clear() 
 
         messages.success(request, f"Order #{order.id} placed successfully!")
         return redirect('order_confirmation', order_id=order.id)
     
-    return render(request, 'payment.html', {'cart': cart})
+    return render(request, 'payment.html', {
+        'cart': cart,
+        'idempotency_key': uuid.uuid4().hex,
+    })
 
 @login_required(login_url='/login/')
 def order_confirmation(request, order_id):
@@ -219,9 +341,9 @@ def order_confirmation(request, order_id):
     
     context = {
         'order': order,
-        'order_summary': order.product_names.split('\n'),
-        'categories': Category.objects.all(), 
-        'cart': Cart(request), 
+        'order_items': order.items.all(),
+        'categories': get_nav_categories(), 
+        'cart': get_request_cart(request), 
     }
     
     return render(request, 'order_confirmation.html', context)
@@ -229,21 +351,35 @@ def order_confirmation(request, order_id):
 # --- WISHLIST VIEWS ---
 
 @login_required(login_url='/login/')
-def add_to_wishlist(request, product_id):
+@require_POST
+def toggle_wishlist(request, product_id):
+    """
+    Saves the product to the wishlist, or removes it if already saved. JSON
+    callers (wishlist.js) get the new state; plain forms are sent to `next`.
+    """
     product = get_object_or_404(Product, id=product_id)
-    
-    wishlist_item, created = Wishlist.objects.get_or_create(
-        user=request.user,
-        product=product
-    )
 
-    if created:
+    removed, _ = Wishlist.objects.filter(user=request.user, product=product).delete()
+    saved = not removed
+    if saved:
+        try:
+            with transaction.atomic():
+                Wishlist.objects.create(user=request.user, product=product)
+        except IntegrityError:
+            pass  # A double click saved it already
+
+    if wants_json(request):
+        return JsonResponse({'product_id': product.id, 'saved': saved})
+
+    if saved:
         messages.success(request, f"{product.name} added to your wishlist!")
     else:
-        wishlist_item.delete()
         messages.info(request, f"{product.name} removed from your wishlist.")
 
-    return redirect(request.META.get('HTTP_REFERER', 'index'))
+    next_url = request.POST.get('next')
+    if not url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}, require_https=request.is_secure()):
+        next_url = reverse('wishlist')
+    return redirect(next_url)
 
 
 @login_required(login_url='/login/')
@@ -263,10 +399,20 @@ def wishlist_view(request):
 
 @login_required(login_url='/login/')
 def track_orders_view(request):
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
+    orders = Order.objects.filter(user=request.user).prefetch_related('items')
+    try:
+        page = paginate_newest_first(
+            orders,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            page_size=settings.ORDERS_PAGE_SIZE,
+        )
+    except InvalidCursor:
+        page = paginate_newest_first(orders, page_size=settings.ORDERS_PAGE_SIZE)
     context = {
         'title': 'Track Orders', 
-        'orders': orders, 
+        'orders': page.object_list,
+        'page': page,
     }
     return render(request, 'track_orders.html', context)
 
@@ -465,9 +611,19 @@ def account_settings_view(request):
         form = AccountSettingsForm(request.POST, instance=request.user)
         
         if form.is_valid():
-            form.save()
-            messages.success(request, "Account details updated successfully!")
-            return redirect('account_settings')
+            try:
+                with transaction.atomic():
+                    form.save()
+            except IntegrityError as exc:
+                # Lost a race with another account taking the same email
+                field = duplicate_user_field(exc)
+                if field is None:
+                    raise
+                form.add_error(field, DUPLICATE_USER_MESSAGES[field])
+                messages.error(request, "Please correct the errors below.")
+            else:
+                messages.success(request, "Account details updated successfully!")
+                return redirect('account_settings')
         else:
             messages.error(request, "Please correct the errors below.")
     else:
@@ -485,4 +641,28 @@ def account_settings_view(request):
 def logout_view(request):
     auth_logout(request)
     messages.success(request, "You have been logged out.")
-    return redirect('index')
\ No newline at end of file
+    return redirect('index')
+
+
+# --- EXPORT VIEWS ---
+
+def export_response(lines, file_format, filename):
+    """Streams export lines as a download; nothing is built up in memory."""
+    if file_format not in FORMATS:
+        raise Http404("Unknown export format")
+    response = StreamingHttpResponse(lines, content_type=FORMATS[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_format}"'
+    return response
+
+@staff_member_required
+def export_products_view(request, file_format):
+    return export_response(export_products(file_format), file_format, 'products')
+
+@staff_member_required
+def export_all_orders_view(request, file_format):
+    return export_response(export_orders(file_format, Order.objects.all()), file_format, 'orders')
+
+@login_required(login_url='/login/')
+def export_my_orders_view(request, file_format):
+    orders = Order.objects.filter(user=request.user)
+    return export_response(export_orders(file_format, orders), file_format, 'my-orders')
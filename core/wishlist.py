@@ -0,0 +1,15 @@
+from .cart import get_request_user
+from .models import Wishlist
+
+
+def get_request_wishlist_ids(request):
+    """Ids of the products the logged-in user has saved, fetched at most once per request."""
+    if not hasattr(request, '_wishlist_ids'):
+        user = get_request_user(request)
+        if user:
+            request._wishlist_ids = set(
+                Wishlist.objects.filter(user=user).values_list('product_id', flat=True)
+            )
+        else:
+            request._wishlist_ids = set()
+    return request._wishlist_ids
@@ -48,7 +48,9 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CachedUserMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -64,6 +66,8 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.cart',
+                'core.context_processors.wishlist',
             ],
         },
     },
@@ -86,6 +90,28 @@ DATABASES = {
 }
 
 
+# Cache used for the catalog versions, carts, sessions and page cache. It has
+# to be shared by every worker process, or invalidations made in one process
+# (category menu, cart deletion generation, order summaries ...) are never seen
+# by the others. CACHE_URL picks it: redis://host:6379/0 (the production
+# default; needs the `redis` package), db:// or db://<table> for a table in the
+# main database (made by `manage.py createcachetable`; works without a Redis
+# server, but every cache read is then a query) or locmem:// for a per-process
+# cache, which is only fine for a single development server.
+CACHE_URL = os.environ.get('CACHE_URL', 'locmem://' if DEBUG else 'redis://127.0.0.1:6379/0')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}}
+elif CACHE_URL.startswith('db://'):
+    CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': CACHE_URL[len('db://'):] or 'django_cache',
+    }}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+# Username or email login, resolved in one indexed query (see core/backends.py)
+AUTHENTICATION_BACKENDS = ['core.backends.EmailOrUsernameBackend']
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -138,7 +164,86 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Where sessions live. The default is the database. cached_db reads them
+# through SESSION_CACHE_ALIAS first (only safe with a cache shared by every
+# process, e.g. Redis); signed_cookies keeps them in the browser and never
+# touches the database, which suits the default DatabaseCartStorage since the
+# session then only holds the cart id and login state.
+SESSION_ENGINE = os.environ.get('SESSION_ENGINE', 'django.contrib.sessions.backends.db')
+SESSION_CACHE_ALIAS = 'default'
+
 CART_SESSION_ID = 'cart'
+CART_GENERATION_SESSION_ID = 'cart_generation'
+CART_ID_SESSION_KEY = 'cart_id'
+
+# Where carts are kept: core.cart.DatabaseCartStorage (CartItem rows),
+# core.cart.CacheCartStorage (one cache key per visitor) or
+# core.cart.SessionCartStorage (the whole cart inside the session)
+# Anonymous database carts outlive their session; `manage.py clear_abandoned_carts`
+# (run after clearsessions) deletes them.
+CART_STORAGE = os.environ.get('CART_STORAGE', 'core.cart.DatabaseCartStorage')
+CART_CACHE_ALIAS = 'default'
+CART_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+
+# Number of product cards per page on the index, category and search grids
+PRODUCTS_PAGE_SIZE = int(os.environ.get('PRODUCTS_PAGE_SIZE', 24))
+
+# Serve request.user from the cache instead of querying auth_user on every
+# request (core.middleware.CachedUserMiddleware). Only enable it with a cache
+# shared by all processes, or invalidations won't reach the other workers.
+USER_CACHE_ENABLED = os.environ.get('USER_CACHE_ENABLED') == '1'
+USER_CACHE_ALIAS = 'default'
+USER_CACHE_TIMEOUT = 60 * 15
+
+# Widths (px) of the resized product image copies made by core/images.py, and
+# the JPEG/WebP quality they are saved with. 120 covers the 60px cart
+# thumbnails on 2x screens.
+PRODUCT_IMAGE_WIDTHS = (120, 320, 640, 1024)
+PRODUCT_IMAGE_QUALITY = 80
+
+# manage.py import_catalog: rows written per bulk_create/bulk_update batch,
+# concurrent image downloads, and the per-image download timeout (seconds)
+IMPORT_BATCH_SIZE = 1000
+IMPORT_IMAGE_WORKERS = 8
+IMPORT_IMAGE_TIMEOUT = 20
+
+# Products classified per CASE UPDATE by manage.py categorize_products
+CATEGORIZE_BATCH_SIZE = 1000
+
+# Rows fetched per database round trip by the streaming exports (core/exports.py)
+EXPORT_CHUNK_SIZE = 2000
+
+# Whole-page cache of the catalog pages for anonymous visitors without a cart
+# (core.middleware.AnonymousPageCacheMiddleware), kept in the default cache next
+# to the catalog version it is checked against. Catalog writes invalidate it
+# through that version; the timeout bounds how stale stock notices (updated
+# without signals at checkout) can get.
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', '0' if DEBUG else '1') == '1'
+PAGE_CACHE_TIMEOUT = 60 * 5
+PAGE_CACHE_URL_NAMES = ('index', 'category_detail', 'product_detail')
+PAGE_CACHE_IGNORED_PARAMS = ('fbclid', 'gclid')
+
+# Number of orders per page on the order tracking page
+ORDERS_PAGE_SIZE = 10
+
+# Seconds a user's dashboard order summary stays cached. Order saves and deletes
+# invalidate it; this bounds staleness after writes that skip the signals
+ORDER_SUMMARY_CACHE_TIMEOUT = 60 * 15
+
+# manage.py rollup_sales: order ids folded per transaction, and how many seconds
+# an order must be old before it is counted (lets in-flight checkouts commit)
+SALES_ROLLUP_BATCH_SIZE = 5000
+SALES_ROLLUP_LAG = 5 * 60
+
+# Number of entries returned by the /search/suggest/ autocomplete endpoint
+SEARCH_SUGGEST_LIMIT = 8
+
+# Seconds before a process rebuilds its in-memory suggestion index, which its
+# own signals keep current but which misses other processes' and bulk writes
+SEARCH_SUGGEST_REFRESH = 60 * 5
+
+# Seconds the category menu stays cached; signals invalidate it earlier on change
+NAV_CACHE_TIMEOUT = 60 * 60
 
 from django.contrib.messages import constants as messages
 
@@ -149,8 +254,37 @@ MESSAGE_TAGS = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads and resized image variants are saved under content-hashed names
+# (core/storage.py), which is what lets serve_media cache them as immutable
+STORAGES = {
+    'default': {'BACKEND': 'core.storage.HashedFileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+# core.media.serve_media: seconds browsers may reuse a media file before
+# revalidating it, and the file names that never change content (the
+# '.0123456789ab.' hashes written by core.storage) which are cached for a year
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24
+MEDIA_IMMUTABLE_PATTERN = r'\.[0-9a-f]{12}\.\w+$'
+
+# Let the web server send media bytes: 'x-accel-redirect' (nginx, which needs an
+# internal location at MEDIA_OFFLOAD_PREFIX aliased to MEDIA_ROOT) or
+# 'x-sendfile' (Apache mod_xsendfile, lighttpd). Empty streams from Python.
+MEDIA_OFFLOAD = os.environ.get('MEDIA_OFFLOAD', '')
+MEDIA_OFFLOAD_PREFIX = '/protected-media/'
+
 CSRF_TRUSTED_ORIGINS = [
     'https://*.ngrok-free.dev',
     'https://*.ngrok-free.app',
     'https://*.onrender.com',
 ]
+
+# Background task queue (core/tasks.py, `manage.py run_worker`)
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_BACKOFF = 10                  # seconds before the first retry; doubles each attempt
+TASK_LOCK_TIMEOUT = 60 * 10              # running tasks older than this are assumed abandoned
+TASK_DONE_RETENTION = 60 * 60 * 24 * 7   # seconds finished tasks are kept before workers delete them
+TASK_PURGE_INTERVAL = 60 * 60            # seconds between an idle worker's purges
+
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Zestify <no-reply@zestify.local>')
@@ -4,7 +4,8 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce.settings')
 django.setup()
 
-from core.models import Category, Product
+from core.categorizer import categorize_products
+from core.models import Category, CategoryRule
 
 def init_categories():
     # 1. Create the requested categories
@@ -17,24 +18,25 @@ def init_categories():
         categories[name] = cat
         print(f" - {name}")
 
-    # 2. Assign existing products to categories (Auto-assign logic)
+    # 2. Store the keyword rules, then let the categorizer assign products
+    # (see core/categorizer.py; `manage.py categorize_products` re-runs it)
+    rules = {
+        'Smartphone': ['phone', 'iphone'],
+        'Sports': ['football', 'shoe'],
+        'Music': ['headphone', 'speaker'],
+        'Electronics': ['camera', 'laptop'],
+    }
+    print("\nSaving category rules...")
+    for priority, (name, keywords) in enumerate(rules.items(), start=1):
+        for keyword in keywords:
+            CategoryRule.objects.get_or_create(
+                category=categories[name], pattern=keyword,
+                defaults={'priority': priority * 10},
+            )
+
     print("\nUpdating products...")
-    all_products = Product.objects.all()
-    
-    for p in all_products:
-        name_lower = p.name.lower()
-        
-        if 'phone' in name_lower or 'iphone' in name_lower:
-            p.category = categories['Smartphone']
-        elif 'football' in name_lower or 'shoe' in name_lower:
-            p.category = categories['Sports']
-        elif 'headphone' in name_lower or 'speaker' in name_lower:
-            p.category = categories['Music']
-        elif 'camera' in name_lower or 'laptop' in name_lower:
-            p.category = categories['Electronics']
-        
-        p.save()
-        print(f" - Assigned '{p.name}' to {p.category}")
+    result = categorize_products()
+    print(f" - Moved {len(result.changes)} of {result.checked} products")
 
 if __name__ == "__main__":
     init_categories()
\ No newline at end of file
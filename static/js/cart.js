@@ -0,0 +1,91 @@
+/**
+ * Cart buttons without page reloads.
+ *
+ * Any <form data-cart-form> is posted with fetch() asking for JSON; the reply
+ * ({line, count, quantity, total}) is used to patch the cart badge, the cart
+ * rows and the totals in place. A login redirect submits the form normally;
+ * any other failure is reported or reloaded, never posted again, since the
+ * server may already have added the item.
+ */
+(function() {
+  "use strict";
+
+  function formatPrice(amount) {
+    return '₹' + amount;
+  }
+
+  function updatePage(data) {
+    document.querySelectorAll('[data-cart-count]').forEach(el => el.textContent = data.count);
+    document.querySelectorAll('[data-cart-total]').forEach(el => el.textContent = formatPrice(data.total));
+
+    if (!data.line) return;
+    const row = document.querySelector('[data-cart-line="' + data.line.product_id + '"]');
+    if (!row) return;
+    row.querySelectorAll('[data-line-quantity]').forEach(el => el.textContent = data.line.quantity);
+    row.querySelectorAll('[data-line-total]').forEach(el => el.textContent = formatPrice(data.line.total_price));
+    row.querySelectorAll('input[name="quantity"][data-step]').forEach(input => {
+      input.value = data.line.quantity + parseInt(input.dataset.step, 10);
+    });
+  }
+
+  function removeLine(form, data) {
+    const row = form.closest('[data-cart-line]');
+    if (row && !data.line) row.remove();
+    // The last line is gone: reload to show the empty-cart page
+    if (data.count === 0 && document.querySelector('[data-cart-line]') === null && row) {
+      window.location.reload();
+    }
+  }
+
+  function flashButton(button) {
+    if (!button || !button.dataset.doneLabel) return;
+    const original = button.innerHTML;
+    button.innerHTML = button.dataset.doneLabel;
+    setTimeout(() => { button.innerHTML = original; }, 1500);
+  }
+
+  const NETWORK_ERROR = "Couldn't reach the server. Check your connection and try again.";
+
+  function showFailure(response) {
+    // The request may have been handled before it failed, so posting it again
+    // could apply it twice: show the server's message, or the page as it is now
+    return response.json().then(
+      data => data.error ? window.alert(data.error) : window.location.reload(),
+      () => window.location.reload()
+    );
+  }
+
+  document.addEventListener('submit', function(event) {
+    const form = event.target.closest('form[data-cart-form]');
+    if (!form) return;
+    event.preventDefault();
+
+    const button = form.querySelector('button[type="submit"]');
+    if (button) button.disabled = true;
+
+    fetch(form.action, {
+      method: 'POST',
+      body: new FormData(form),
+      headers: { 'Accept': 'application/json' },
+      credentials: 'same-origin',
+      // A login redirect comes back as an opaque response instead of being followed
+      redirect: 'manual'
+    })
+      .then(response => {
+        // Only the login redirect is known not to have changed anything: let
+        // the plain form take the visitor there
+        if (response.type === 'opaqueredirect') return form.submit();
+        if (!response.ok) return showFailure(response);
+        return response.json().then(data => {
+          updatePage(data);
+          removeLine(form, data);
+          flashButton(button);
+        }).catch(error => {
+          // The change went through; show it with a reload rather than posting again
+          console.error(error);
+          window.location.reload();
+        });
+      }, () => window.alert(NETWORK_ERROR))
+      .finally(() => { if (button) button.disabled = false; });
+  });
+})();
@@ -0,0 +1,63 @@
+/**
+ * Wishlist hearts without page reloads.
+ *
+ * Any <form data-wishlist-form> is posted with fetch() asking for JSON; the
+ * reply ({product_id, saved}) flips every toggle for that product on the page.
+ * A login redirect submits the form normally; any other failure is reported
+ * or reloaded, never posted again.
+ */
+(function() {
+  "use strict";
+
+  function render(form, saved) {
+    const button = form.querySelector('button[type="submit"]');
+    if (!button) return;
+    button.setAttribute('aria-pressed', saved ? 'true' : 'false');
+    const label = saved ? button.dataset.savedLabel : button.dataset.unsavedLabel;
+    if (label) button.innerHTML = label;
+  }
+
+  const NETWORK_ERROR = "Couldn't reach the server. Check your connection and try again.";
+
+  function showFailure(response) {
+    // The request may have been handled before it failed, so posting it again
+    // could apply it twice: show the server's message, or the page as it is now
+    return response.json().then(
+      data => data.error ? window.alert(data.error) : window.location.reload(),
+      () => window.location.reload()
+    );
+  }
+
+  document.addEventListener('submit', function(event) {
+    const form = event.target.closest('form[data-wishlist-form]');
+    if (!form) return;
+    event.preventDefault();
+
+    const button = form.querySelector('button[type="submit"]');
+    if (button) button.disabled = true;
+
+    fetch(form.action, {
+      method: 'POST',
+      body: new FormData(form),
+      headers: { 'Accept': 'application/json' },
+      credentials: 'same-origin',
+      // A login redirect comes back as an opaque response instead of being followed
+      redirect: 'manual'
+    })
+      .then(response => {
+        // Only the login redirect is known not to have changed anything: let
+        // the plain form take the visitor there
+        if (response.type === 'opaqueredirect') return form.submit();
+        if (!response.ok) return showFailure(response);
+        return response.json().then(data => {
+          const selector = 'form[data-wishlist-form][data-product-id="' + data.product_id + '"]';
+          document.querySelectorAll(selector).forEach(el => render(el, data.saved));
+        }).catch(error => {
+          // The change went through; show it with a reload rather than posting again
+          console.error(error);
+          window.location.reload();
+        });
+      }, () => window.alert(NETWORK_ERROR))
+      .finally(() => { if (button) button.disabled = false; });
+  });
+})();